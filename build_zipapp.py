@@ -0,0 +1,31 @@
+# build_zipapp.py
+# Builds dist/vertigo.pyz: a zipapp holding precompiled vertigo bytecode, so
+# launches skip compiling vertigo.py. libs/ is copied next to it for IMPORT.
+
+import sys
+import os
+import shutil
+import tempfile
+import py_compile
+import zipapp
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def build(output_dir, interpreter="/usr/bin/env python3"):
+    os.makedirs(output_dir, exist_ok=True)
+    target = os.path.join(output_dir, "vertigo.pyz")
+    with tempfile.TemporaryDirectory() as staging:
+        # A sourceless vertigo.pyc is loaded straight from the archive by zipimport
+        py_compile.compile(os.path.join(BASE_DIR, "vertigo.py"), cfile=os.path.join(staging, "vertigo.pyc"),
+                           doraise=True, optimize=2)
+        with open(os.path.join(staging, "__main__.py"), 'w') as main_file:
+            main_file.write("import sys\nimport vertigo\nvertigo.main(sys.argv)\n")
+        zipapp.create_archive(staging, target, interpreter=interpreter)
+    libs_target = os.path.join(output_dir, "libs")
+    shutil.copytree(os.path.join(BASE_DIR, "libs"), libs_target, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    print(f"Built {target}")
+    return target
+
+if __name__ == "__main__":
+    build(sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, "dist"))
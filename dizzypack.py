@@ -6,11 +6,24 @@ import requests
 import json
 import shutil # For potential file operations like moving/copying on update
 import urllib.parse # For proper URL construction
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Configuration ---
-VERTIGO_REPO_URL = "https://kq4wlc.space/projects/vertigo/"
+VERTIGO_REPO_URL = os.environ.get("VERTIGO_REPO_URL", "https://kq4wlc.space/projects/vertigo/")
 LIBS_DIR_NAME = "libs"
 VERTIGO_EXE_NAME = "vertigo.exe" # Assuming the main interpreter executable name for update command
+CACHE_DIR_NAME = ".dizzycache" # Content-addressed download cache, next to libs/
+MAX_WORKERS = 8 # Concurrent downloads (and pooled connections) for install
+INDEX_FILE_NAME = "index.json" # Repository manifest: versions, hashes and dependencies
+LOCK_FILE_NAME = "dizzypack.lock"
+UPDATE_MANIFEST_SUFFIX = ".manifest.json" # update/vertigo.exe.manifest.json: chunk hashes of the new build
+
+_session = None
+_pool_size = 0
+_cache_lock = threading.Lock()
 
 # --- Utility Functions ---
 
@@ -27,11 +40,117 @@ def get_vertigo_base_dir():
     else:
         return os.path.dirname(os.path.abspath(__file__))
 
+def get_session(workers=MAX_WORKERS):
+    """
+    Returns the shared requests.Session. Its connection pool is grown to hold
+    one connection per worker, so no concurrent download has its connection discarded.
+    """
+    global _session, _pool_size
+    if _session is None:
+        _session = requests.Session()
+    if workers > _pool_size:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+        _pool_size = workers
+    return _session
+
+def file_sha256(path):
+    """Returns the hex SHA-256 of a file, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def atomic_copy(source_path, destination_path):
+    """Copies a file so that destination_path is replaced in a single step."""
+    os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination_path), suffix=".part")
+    os.close(fd)
+    try:
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, destination_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+# --- Download Cache ---
+# Downloads are stored once under <cache>/objects/<sha256>. index.json maps each
+# URL to the object it last produced and the validators (ETag / Last-Modified)
+# needed to revalidate it with a conditional request.
+
+def get_cache_dir():
+    return os.path.join(get_vertigo_base_dir(), CACHE_DIR_NAME)
+
+def load_cache_index():
+    try:
+        with open(os.path.join(get_cache_dir(), "index.json"), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_cache_index(index):
+    cache_dir = get_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "index.json")
+    with open(index_path + ".tmp", 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(index_path + ".tmp", index_path)
+
+def fetch_cached(url, cache_index):
+    """
+    Returns (object_path, changed) for url, going through the download cache.
+    A conditional GET is sent when the cache already holds the URL, so an
+    unchanged file costs one round trip and no body. Raises RequestException.
+    """
+    objects_dir = os.path.join(get_cache_dir(), "objects")
+    os.makedirs(objects_dir, exist_ok=True)
+
+    with _cache_lock:
+        entry = dict(cache_index.get(url, {}))
+    cached_path = os.path.join(objects_dir, entry["sha256"]) if "sha256" in entry else None
+    headers = {}
+    if cached_path and os.path.exists(cached_path):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with get_session().get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304 and headers:
+            return cached_path, False
+        response.raise_for_status()
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=objects_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    digest.update(chunk)
+                    f.write(chunk)
+            object_path = os.path.join(objects_dir, digest.hexdigest())
+            os.replace(temp_path, object_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        with _cache_lock:
+            cache_index[url] = {
+                "sha256": digest.hexdigest(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+    return object_path, True
+
 def download_file(url, destination_path):
     """Downloads a file from a URL to a specified destination path."""
     print(f"Downloading: {url} to {destination_path}")
     try:
-        response = requests.get(url, stream=True)
+        response = get_session().get(url, stream=True)
         response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
 
         # Ensure destination directory exists
@@ -51,31 +170,402 @@ def download_file(url, destination_path):
 
 # --- Core Commands ---
 
-def install_package(package_name):
+def get_package_url(package_name):
+    """Returns the URL of a package's .py file in the repository."""
+    # Assume a single .py file with the package name in the package's folder
+    # Example: http://kq4wlc.space/projects/vertigo/amath/amath.py
+    package_url_base = urllib.parse.urljoin(VERTIGO_REPO_URL, package_name + '/') # Add trailing slash for directory
+    return urllib.parse.urljoin(package_url_base, f"{package_name}.py")
+
+def install_package(package_name, cache_index=None):
     """Installs a Vertigo package (single .py file) from the repository."""
-    print(f"\n--- Installing package '{package_name}' ---")
+    save_index = cache_index is None
+    if save_index:
+        cache_index = load_cache_index()
 
     base_dir = get_vertigo_base_dir()
-    libs_path = os.path.join(base_dir, LIBS_DIR_NAME)
+    file_url = get_package_url(package_name)
+    destination_full_path = os.path.join(base_dir, LIBS_DIR_NAME, f"{package_name}.py")
 
-    # Assume a single .py file with the package name in the package's folder
-    package_file_name = f"{package_name}.py"
+    try:
+        object_path, changed = fetch_cached(file_url, cache_index)
+        if file_sha256(destination_full_path) == os.path.basename(object_path):
+            print(f"Package '{package_name}' is up to date.")
+        else:
+            atomic_copy(object_path, destination_full_path)
+            source = "downloaded" if changed else "from cache"
+            print(f"Package '{package_name}' installed ({source}) to '{destination_full_path}'.")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to install package '{package_name}': {e}")
+        print("Please check the package name and your internet connection.")
+        return False
+    except OSError as e:
+        print(f"File system error installing package '{package_name}': {e}")
+        return False
+    finally:
+        if save_index:
+            save_cache_index(cache_index)
 
-    # Construct URL for the specific .py file
-    # Example: http://kq4wlc.space/projects/vertigo/amath/amath.py
-    package_url_base = urllib.parse.urljoin(VERTIGO_REPO_URL, package_name + '/') # Add trailing slash for directory
-    file_url = urllib.parse.urljoin(package_url_base, package_file_name)
+def install_packages(package_names, workers=MAX_WORKERS):
+    """Installs several packages concurrently over one pooled session."""
+    print(f"\n--- Installing {len(package_names)} package(s) ---")
+    cache_index = load_cache_index()
+    workers = max(1, min(workers, len(package_names)))
+    get_session(workers) # Size the pool before the workers share it
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda name: install_package(name, cache_index), package_names))
+    finally:
+        save_cache_index(cache_index)
 
-    # Construct full destination path
-    destination_full_path = os.path.join(libs_path, package_file_name)
+    failed = [name for name, ok in zip(package_names, results) if not ok]
+    if failed:
+        print(f"\nFailed to install: {', '.join(failed)}")
+        return False
+    print(f"\nAll {len(package_names)} package(s) installed successfully.")
+    return True
+
+# --- Index, Resolution and Lockfile ---
+# The repository may publish index.json:
+#   {"packages": {"<name>": {"versions": {"<version>": {
+#       "file": "<name>/<name>.py", "sha256": "<hex>", "depends": ["other>=1.2"]}}}}}
+# Versions are dotted integers. An offline mirror is a directory with the same
+# layout as the repository (index.json plus the package files).
+
+class ResolutionError(Exception):
+    pass
+
+REQUIREMENT_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+}
+
+def parse_version(version):
+    try:
+        return tuple(int(part) for part in version.split('.'))
+    except ValueError:
+        raise ResolutionError(f"Invalid version '{version}'")
+
+def parse_requirement(requirement):
+    """Splits 'name>=1.2' into ('name', ('>=', (1, 2))); a bare name has no constraint."""
+    for op in sorted(REQUIREMENT_OPERATORS, key=len, reverse=True):
+        if op in requirement:
+            name, version = requirement.split(op, 1)
+            return name.strip(), (op, parse_version(version.strip()))
+    return requirement.strip(), None
+
+def fetch_index(mirror=None):
+    """
+    Returns the repository index, or None if the repository does not publish one.
+    A mirror must have its own index: installs from a mirror never fall back to the network.
+    """
+    if mirror:
+        with open(os.path.join(mirror, INDEX_FILE_NAME), 'r') as f:
+            return json.load(f)
+    response = get_session().get(urllib.parse.urljoin(VERTIGO_REPO_URL, INDEX_FILE_NAME))
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def resolve(requirements, index):
+    """
+    Computes the full install set for requirements: {name: (version, entry)}.
+    Constraints come only from the requirements and the dependencies of the
+    versions currently chosen. Each package takes the newest version that
+    satisfies them; on a conflict the search backs up to the last choice and
+    tries its next older version.
+    """
+    packages = index.get("packages", {})
+    roots = [parse_requirement(requirement) for requirement in requirements]
+    failure = []
 
-    if download_file(file_url, destination_full_path):
-        print(f"\nPackage '{package_name}' installed successfully to '{destination_full_path}'.")
+    def satisfies(version, constraints):
+        return all(REQUIREMENT_OPERATORS[op](parse_version(version), bound) for op, bound in constraints)
+
+    def unsatisfied(name, constraints):
+        wanted = ", ".join(f"{op}{'.'.join(map(str, bound))}" for op, bound in sorted(constraints))
+        return f"No version of '{name}' satisfies {wanted}"
+
+    def search(chosen):
+        constraints = {}
+        for name, constraint in roots:
+            constraints.setdefault(name, set())
+            if constraint:
+                constraints[name].add(constraint)
+        for name, version in chosen.items():
+            for dependency in packages[name]["versions"][version].get("depends", []):
+                dep_name, constraint = parse_requirement(dependency)
+                constraints.setdefault(dep_name, set())
+                if constraint:
+                    constraints[dep_name].add(constraint)
+
+        for name, version in chosen.items():
+            if not satisfies(version, constraints.get(name, ())):
+                failure[:] = [unsatisfied(name, constraints[name])]
+                return None
+        pending = [name for name in constraints if name not in chosen]
+        if not pending:
+            return chosen
+        name = pending[0]
+        if name not in packages:
+            failure[:] = [f"Package '{name}' is not in the repository index"]
+            return None
+        candidates = [version for version in packages[name].get("versions", {})
+                      if satisfies(version, constraints[name])]
+        if not candidates:
+            failure[:] = [unsatisfied(name, constraints[name])]
+        for version in sorted(candidates, key=parse_version, reverse=True):
+            result = search({**chosen, name: version})
+            if result is not None:
+                return result
+        return None
+
+    chosen = search({})
+    if chosen is None:
+        raise ResolutionError(failure[0])
+    return {name: (version, packages[name]["versions"][version]) for name, version in chosen.items()}
+
+def write_lockfile(requirements, resolved):
+    """Writes the resolved install set to the lockfile next to libs/."""
+    lock = {
+        "lock_version": 1,
+        "requirements": list(requirements),
+        "packages": {
+            name: {
+                "version": version,
+                "file": entry.get("file", f"{name}/{name}.py"),
+                "sha256": entry["sha256"],
+            }
+            for name, (version, entry) in sorted(resolved.items())
+        },
+    }
+    lock_path = os.path.join(get_vertigo_base_dir(), LOCK_FILE_NAME)
+    with open(lock_path + ".tmp", 'w') as f:
+        json.dump(lock, f, indent=2)
+    os.replace(lock_path + ".tmp", lock_path)
+    print(f"Wrote {len(resolved)} package(s) to '{lock_path}'.")
+    return lock
+
+def read_lockfile():
+    with open(os.path.join(get_vertigo_base_dir(), LOCK_FILE_NAME), 'r') as f:
+        return json.load(f)
+
+def install_locked_package(name, locked, cache_index, mirror=None):
+    """Installs one lockfile entry, refusing any file whose SHA-256 does not match the lock."""
+    destination_full_path = os.path.join(get_vertigo_base_dir(), LIBS_DIR_NAME, f"{name}.py")
+    expected = locked["sha256"]
+    try:
+        if file_sha256(destination_full_path) == expected:
+            print(f"Package '{name}' {locked['version']} is up to date.")
+            return True
+
+        source_path = os.path.join(get_cache_dir(), "objects", expected)
+        origin = "from cache"
+        if not os.path.exists(source_path):
+            if mirror:
+                source_path = os.path.join(mirror, *locked["file"].split('/'))
+                origin = "from mirror"
+            else:
+                source_path, _ = fetch_cached(urllib.parse.urljoin(VERTIGO_REPO_URL, locked["file"]), cache_index)
+                origin = "downloaded"
+        if file_sha256(source_path) != expected:
+            print(f"Hash mismatch for package '{name}' {locked['version']} ({origin}); not installed.")
+            return False
+        atomic_copy(source_path, destination_full_path)
+        print(f"Package '{name}' {locked['version']} installed ({origin}).")
         return True
-    else:
-        print(f"\nFailed to install package '{package_name}'. Please check the package name and your internet connection.")
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to download package '{name}': {e}")
+        return False
+    except OSError as e:
+        print(f"File system error installing package '{name}': {e}")
         return False
 
+def install_from_lockfile(lock=None, workers=MAX_WORKERS, mirror=None):
+    """Installs exactly what the lockfile lists, in parallel, without resolving."""
+    if lock is None:
+        try:
+            lock = read_lockfile()
+        except FileNotFoundError:
+            print(f"No {LOCK_FILE_NAME} found. Run 'dizzypack lock <package>...' first.")
+            return False
+    packages = lock.get("packages", {})
+    if not packages:
+        print("Lockfile lists no packages.")
+        return True
+    print(f"\n--- Installing {len(packages)} locked package(s) ---")
+    cache_index = load_cache_index()
+    workers = max(1, min(workers, len(packages)))
+    get_session(workers) # Size the pool before the workers share it
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda item: install_locked_package(item[0], item[1], cache_index, mirror), packages.items()))
+    finally:
+        save_cache_index(cache_index)
+    failed = [name for name, ok in zip(packages, results) if not ok]
+    if failed:
+        print(f"\nFailed to install: {', '.join(failed)}")
+        return False
+    print(f"\nAll {len(packages)} locked package(s) installed successfully.")
+    return True
+
+def load_index(mirror=None):
+    """Returns (ok, index): fetch_index() with its errors reported instead of raised."""
+    try:
+        return True, fetch_index(mirror)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching the package index: {e}")
+    except (OSError, ValueError) as e:
+        print(f"Error reading the package index: {e}")
+    return False, None
+
+def lock_packages(requirements, index):
+    """Resolves requirements against the index and writes the lockfile. Returns the lock or None."""
+    if index is None:
+        print("The repository has no package index; cannot resolve dependencies.")
+        return None
+    try:
+        return write_lockfile(requirements, resolve(requirements, index))
+    except ResolutionError as e:
+        print(f"Dependency resolution failed: {e}")
+    except OSError as e:
+        print(f"Error writing the lockfile: {e}")
+    return None
+
+# --- Interpreter Update ---
+# The update folder may publish a manifest next to the executable:
+#   {"size": <bytes>, "sha256": "<hex>", "chunk_size": <bytes>, "chunks": ["<hex>", ...]}
+# Chunks that already match (in a partial download or the installed
+# executable) are reused, so only changed chunks are fetched and an
+# interrupted update resumes where it stopped.
+
+class ChunkMismatchError(Exception):
+    pass
+
+def read_chunk(path, index, chunk_size):
+    try:
+        with open(path, 'rb') as f:
+            f.seek(index * chunk_size)
+            return f.read(chunk_size)
+    except FileNotFoundError:
+        return None
+
+def chunk_ranges(indexes):
+    """Groups sorted chunk indexes into runs of consecutive chunks: [(first, last), ...]."""
+    ranges = []
+    for index in indexes:
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return ranges
+
+def fetch_chunks(url, first, last, manifest, output):
+    """
+    Downloads chunks first..last with one Range request, hashing each chunk as it
+    arrives and writing it into output only once it has verified.
+    """
+    chunk_size = manifest["chunk_size"]
+    start = first * chunk_size
+    end = min((last + 1) * chunk_size, manifest["size"]) - 1
+    with get_session().get(url, headers={"Range": f"bytes={start}-{end}"}, stream=True) as response:
+        response.raise_for_status()
+        # A server that ignores Range sends the whole file from byte 0
+        position = start if response.status_code == 206 else 0
+        index = first
+        buffer = bytearray()
+        for data in response.iter_content(chunk_size=65536):
+            if position < start:
+                skip = min(len(data), start - position)
+                data = data[skip:]
+                position += skip
+            buffer += data
+            position += len(data)
+            while index <= last:
+                expected_size = min(chunk_size, manifest["size"] - index * chunk_size)
+                if len(buffer) < expected_size:
+                    break
+                chunk = bytes(buffer[:expected_size])
+                del buffer[:expected_size]
+                if hashlib.sha256(chunk).hexdigest() != manifest["chunks"][index]:
+                    raise ChunkMismatchError(f"Chunk {index} failed verification")
+                output.seek(index * chunk_size)
+                output.write(chunk)
+                index += 1
+            if index > last:
+                break
+        if index <= last:
+            raise ChunkMismatchError(f"Download ended before chunk {index}")
+
+def check_manifest(manifest):
+    """Raises ValueError unless the manifest has the shape described above."""
+    if not isinstance(manifest, dict):
+        raise ValueError("not a JSON object")
+    for key, kind in [("size", int), ("sha256", str), ("chunk_size", int), ("chunks", list)]:
+        if not isinstance(manifest.get(key), kind) or isinstance(manifest.get(key), bool):
+            raise ValueError(f"missing or invalid '{key}'")
+    if manifest["size"] < 0 or manifest["chunk_size"] <= 0:
+        raise ValueError("'size' must not be negative and 'chunk_size' must be positive")
+    if not all(isinstance(chunk, str) for chunk in manifest["chunks"]):
+        raise ValueError("'chunks' must be a list of hashes")
+    expected = -(-manifest["size"] // manifest["chunk_size"])
+    if len(manifest["chunks"]) != expected:
+        raise ValueError(f"{len(manifest['chunks'])} chunk hash(es) listed, {expected} needed for {manifest['size']} bytes")
+
+def update_vertigo_chunked(new_vertigo_url, manifest, vertigo_exe_path, temp_vertigo_path, backup_vertigo_path):
+    """
+    Brings temp_vertigo_path up to the manifest chunk by chunk, then swaps it in
+    atomically. Returns False if the installed executable is already current.
+    """
+    chunk_size = manifest["chunk_size"]
+    if file_sha256(vertigo_exe_path) == manifest["sha256"]:
+        return False
+
+    missing = []
+    reused = 0
+    mode = 'r+b' if os.path.exists(temp_vertigo_path) else 'w+b'
+    with open(temp_vertigo_path, mode) as output:
+        for index, expected in enumerate(manifest["chunks"]):
+            partial = read_chunk(temp_vertigo_path, index, chunk_size)
+            if partial and hashlib.sha256(partial).hexdigest() == expected:
+                reused += 1
+                continue
+            current = read_chunk(vertigo_exe_path, index, chunk_size)
+            if current and hashlib.sha256(current).hexdigest() == expected:
+                output.seek(index * chunk_size)
+                output.write(current)
+                reused += 1
+                continue
+            missing.append(index)
+
+        print(f"{reused} of {len(manifest['chunks'])} chunk(s) already present, downloading {len(missing)}.")
+        for first, last in chunk_ranges(missing):
+            fetch_chunks(new_vertigo_url, first, last, manifest, output)
+        output.truncate(manifest["size"])
+
+    if file_sha256(temp_vertigo_path) != manifest["sha256"]:
+        os.remove(temp_vertigo_path)
+        raise ChunkMismatchError("Assembled executable does not match the manifest hash")
+
+    if os.path.exists(vertigo_exe_path):
+        # A hard link keeps the old version without copying it; fall back to a copy
+        if os.path.exists(backup_vertigo_path):
+            os.remove(backup_vertigo_path)
+        try:
+            os.link(vertigo_exe_path, backup_vertigo_path)
+        except OSError:
+            shutil.copy2(vertigo_exe_path, backup_vertigo_path)
+        shutil.copymode(vertigo_exe_path, temp_vertigo_path)
+    os.replace(temp_vertigo_path, vertigo_exe_path)
+    return True
+
 def update_vertigo():
     """Updates the Vertigo interpreter executable."""
     print("\n--- Checking for Vertigo interpreter update ---")
@@ -84,15 +574,50 @@ def update_vertigo():
     vertigo_exe_path = os.path.join(base_dir, VERTIGO_EXE_NAME)
 
     # Update files are typically in a dedicated 'update' folder on the server
-    # NEW: Use urljoin for update URL base
     update_url_base = urllib.parse.urljoin(VERTIGO_REPO_URL, "update/") # Add trailing slash
     new_vertigo_url = urllib.parse.urljoin(update_url_base, VERTIGO_EXE_NAME)
+    manifest_url = urllib.parse.urljoin(update_url_base, VERTIGO_EXE_NAME + UPDATE_MANIFEST_SUFFIX)
 
     temp_vertigo_path = os.path.join(base_dir, f"{VERTIGO_EXE_NAME}.new")
     backup_vertigo_path = os.path.join(base_dir, f"{VERTIGO_EXE_NAME}.bak")
 
     print(f"Looking for update at: {new_vertigo_url}")
 
+    try:
+        response = get_session().get(manifest_url)
+        manifest = None
+        if response.status_code != 404:
+            response.raise_for_status()
+            manifest = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Failed to fetch the update manifest: {e}. Aborting update process.")
+        return False
+
+    if manifest is not None:
+        try:
+            check_manifest(manifest)
+        except ValueError as e:
+            print(f"Invalid update manifest: {e}. Aborting update process.")
+            return False
+        try:
+            if not update_vertigo_chunked(new_vertigo_url, manifest, vertigo_exe_path, temp_vertigo_path, backup_vertigo_path):
+                print(f"{VERTIGO_EXE_NAME} is already up to date.")
+                return True
+        except (requests.exceptions.RequestException, ChunkMismatchError) as e:
+            print(f"Update interrupted: {e}")
+            print("Run 'dizzypack update' again to resume from the last verified chunk.")
+            return False
+        except OSError as e:
+            print(f"Error replacing {VERTIGO_EXE_NAME}: {e}")
+            print("This might happen if Vertigo is currently running.")
+            return False
+        print("Vertigo interpreter updated successfully!")
+        if os.path.exists(backup_vertigo_path):
+            print(f"A backup of the old version is at: {backup_vertigo_path}")
+        print("Please restart Vertigo if it was running to use the new version.")
+        return True
+
+    # No manifest: download the whole executable
     if not download_file(new_vertigo_url, temp_vertigo_path):
         print("Failed to download Vertigo update. Aborting update process.")
         return False
@@ -108,7 +633,7 @@ def update_vertigo():
         # This update process assumes vertigo.exe is NOT running or
         # will require the user to manually restart after the update.
         print(f"Replacing {VERTIGO_EXE_NAME} with the new version...")
-        shutil.move(temp_vertigo_path, vertigo_exe_path)
+        os.replace(temp_vertigo_path, vertigo_exe_path)
         print("Vertigo interpreter updated successfully!")
         print(f"A backup of the old version is at: {backup_vertigo_path}")
         print("Please restart Vertigo if it was running to use the new version.")
@@ -124,15 +649,49 @@ def update_vertigo():
 
 # --- Main Execution ---
 
+def parse_options(args):
+    """Splits '--jobs N' and '--mirror DIR' off the front of args."""
+    options = {"workers": MAX_WORKERS, "mirror": None}
+    while len(args) >= 2 and args[0] in ["--jobs", "--mirror"]:
+        if args[0] == "--jobs":
+            options["workers"] = int(args[1])
+        else:
+            options["mirror"] = args[1]
+        args = args[2:]
+    return options, args
+
 def main():
+    usage = ("Usage: dizzypack install [--jobs N] [--mirror DIR] <package>... | lock <package>... | "
+             "sync [--jobs N] [--mirror DIR] | <package_name> | update")
     if len(sys.argv) < 2:
-        print("Usage: dizzypack <package_name> | update")
+        print(usage)
         sys.exit(1)
 
     command = sys.argv[1].lower()
+    options, args = parse_options(sys.argv[2:])
 
     if command == "update":
         update_vertigo()
+    elif command in ["install", "lock"]:
+        if not args:
+            print(usage)
+            sys.exit(1)
+        ok, index = load_index(options["mirror"])
+        if not ok:
+            sys.exit(1)
+        if command == "install" and index is None:
+            # Repositories without an index only offer standalone packages
+            ok = install_packages(args, options["workers"])
+        else:
+            lock = lock_packages(args, index)
+            ok = lock is not None
+            if ok and command == "install":
+                ok = install_from_lockfile(lock, options["workers"], options["mirror"])
+        if not ok:
+            sys.exit(1)
+    elif command == "sync":
+        if not install_from_lockfile(workers=options["workers"], mirror=options["mirror"]):
+            sys.exit(1)
     else:
         install_package(command)
 
@@ -8,102 +8,173 @@ immutables["+c"] = 29979
 immutables["+g"] = 6.6743
 immutables["+h"] = 1.0545
 
-def handle_amath(parts):
-    global instruction_pointer, stacks, curstack, registers
-    if len(parts) >= 3:
-        op = parts[1].upper()
-        dest = parts[2]
-        args = [get_value(arg) for arg in parts[3:]]
+def amath_incorrect(op):
+    raise ValueError(f"Unknown or incorrect arguments for math operation '{op}'")
 
-        result = None
+def amath_log(x):
+    if x > 0:
+        return math.log(x)
+    raise ValueError("Logarithm of non-positive number")
 
-        try:
-            if op == "SIN" and len(args) == 1:
-                result = math.sin(args[0])
-            elif op == "COS" and len(args) == 1:
-                result = math.cos(args[0])
-            elif op == "TAN" and len(args) == 1:
-                result = math.tan(args[0])
-            elif op == "ASIN" and len(args) == 1:
-                result = math.asin(args[0])
-            elif op == "ACOS" and len(args) == 1:
-                result = math.acos(args[0])
-            elif op == "ATAN" and len(args) == 1:
-                result = math.atan(args[0])
-            elif op == "ATAN2" and len(args) == 2:
-                result = math.atan2(args[0], args[1])
-            elif op == "LOG" and len(args) == 1:
-                if args[0] > 0:
-                    result = math.log(args[0])
-                else:
-                    raise ValueError("Logarithm of non-positive number")
-            elif op == "LOG10" and len(args) == 1:
-                if args[0] > 0:
-                    result = math.log10(args[0])
-                else:
-                    raise ValueError("Logarithm of non-positive number")
-            elif op == "EXP" and len(args) == 1:
-                result = math.exp(args[0])
-            elif op == "SQRT" and len(args) == 1:
-                if args[0] >= 0:
-                    result = math.sqrt(args[0])
-                else:
-                    raise ValueError("Square root of negative number")
-            elif op == "ABS" and len(args) == 1:
-                result = abs(args[0])
-            elif op == "FLOOR" and len(args) == 1:
-                result = math.floor(args[0])
-            elif op == "CEIL" and len(args) == 1:
-                result = math.ceil(args[0])
-            elif op == "ROUND" and len(args) in [1, 2]:
-                if len(args) == 1:
-                    result = round(args[0])
-                else:
-                    result = round(args[0], int(args[1]))
-            elif op == "FACTORIAL" and len(args) == 1:
-                if isinstance(args[0], int) and args[0] >= 0:
-                    result = math.factorial(args[0])
-                else:
-                    raise ValueError("Factorial requires a non-negative integer")
-            elif op == "GCD" and len(args) == 2:
-                result = math.gcd(int(args[0]), int(args[1]))
-            elif op == "LCM" and len(args) == 2:
-                result = (int(args[0]) * int(args[1])) // math.gcd(int(args[0]), int(args[1]))
-            # Complex number operations (assuming complex numbers are handled as a type)
-            elif op == "COMPLEX" and len(args) == 2:
-                result = complex(args[0], args[1])
-            elif op == "REALPART" and len(args) == 1 and isinstance(args[0], complex):
-                result = args[0].real
-            elif op == "IMAGPART" and len(args) == 1 and isinstance(args[0], complex):
-                result = args[0].imag
-            elif op == "CONJUGATE" and len(args) == 1 and isinstance(args[0], complex):
-                result = args[0].conjugate()
-            elif op == "MAGNITUDE" and len(args) == 1 and isinstance(args[0], complex):
-                result = abs(args[0])
-            elif op == "PHASE" and len(args) == 1 and isinstance(args[0], complex):
-                result = math.atan2(args[0].imag, args[0].real)
-            else:
-                raise ValueError(f"Unknown or incorrect arguments for math operation '{op}'")
-
-            if result is not None:
-                if dest == "&":
-                    if curstack:
-                        stacks[curstack].append(result)
-                    else:
-                        raise ValueError("No stack selected for '&' destination")
-                elif dest in registers:
-                    registers[dest] = result
-                elif dest.startswith("$"):
-                    raise TypeError(f"Cannot assign to immutable '{dest}'")
-                else:
-                    raise ValueError(f"Invalid destination '{dest}'")
+def amath_log10(x):
+    if x > 0:
+        return math.log10(x)
+    raise ValueError("Logarithm of non-positive number")
+
+def amath_sqrt(x):
+    if x >= 0:
+        return math.sqrt(x)
+    raise ValueError("Square root of negative number")
+
+def amath_factorial(x):
+    if isinstance(x, int) and x >= 0:
+        return math.factorial(x)
+    raise ValueError("Factorial requires a non-negative integer")
+
+def amath_complex_part(op, part):
+    def complex_part(z):
+        if not isinstance(z, complex):
+            amath_incorrect(op)
+        return part(z)
+    return complex_part
+
+# math.fma only exists from Python 3.13
+amath_fma = getattr(math, "fma", None) or (lambda x, y, z: x * y + z)
 
+# op -> (accepted argument counts, function); None accepts any count
+amath_ops = {
+    "SIN": ((1,), math.sin),
+    "COS": ((1,), math.cos),
+    "TAN": ((1,), math.tan),
+    "ASIN": ((1,), math.asin),
+    "ACOS": ((1,), math.acos),
+    "ATAN": ((1,), math.atan),
+    "ATAN2": ((2,), math.atan2),
+    "LOG": ((1,), amath_log),
+    "LOG10": ((1,), amath_log10),
+    "EXP": ((1,), math.exp),
+    "SQRT": ((1,), amath_sqrt),
+    "ABS": ((1,), abs),
+    "FLOOR": ((1,), math.floor),
+    "CEIL": ((1,), math.ceil),
+    "ROUND": ((1, 2), lambda x, digits=None: round(x) if digits is None else round(x, int(digits))),
+    "FACTORIAL": ((1,), amath_factorial),
+    "GCD": ((2,), lambda a, b: math.gcd(int(a), int(b))),
+    "LCM": ((2,), lambda a, b: (int(a) * int(b)) // math.gcd(int(a), int(b))),
+    "COMPLEX": ((2,), complex),
+    "REALPART": ((1,), amath_complex_part("REALPART", lambda z: z.real)),
+    "IMAGPART": ((1,), amath_complex_part("IMAGPART", lambda z: z.imag)),
+    "CONJUGATE": ((1,), amath_complex_part("CONJUGATE", lambda z: z.conjugate())),
+    "MAGNITUDE": ((1,), amath_complex_part("MAGNITUDE", abs)),
+    "PHASE": ((1,), amath_complex_part("PHASE", lambda z: math.atan2(z.imag, z.real))),
+    # Fused forms
+    "HYPOT": (None, math.hypot),
+    "FMA": ((3,), amath_fma),
+    "SINCOS": ((1,), lambda x: (math.sin(x), math.cos(x))),
+}
+
+# Ops that produce several results, pushed in order
+amath_multi = {"SINCOS"}
+
+def amath_literal(operand):
+    # Numeric literals are resolved once per site; anything else is looked up on every run
+    if operand.isdigit() or (operand.startswith("-") and operand[1:].isdigit()):
+        return True, int(operand)
+    if operand.replace('.', '', 1).isdigit() or (operand.startswith("-") and operand[1:].replace('.', '', 1).isdigit()):
+        return True, float(operand)
+    return False, None
+
+def amath_store(dest, result):
+    if dest == "&":
+        if curstack:
+            stacks[curstack].append(result)
+        else:
+            raise ValueError("No stack selected for '&' destination")
+    elif dest in registers:
+        registers[dest] = result
+    elif dest.startswith("$"):
+        raise TypeError(f"Cannot assign to immutable '{dest}'")
+    else:
+        raise ValueError(f"Invalid destination '{dest}'")
+
+def amath_batch_site(op, function, count_operand):
+    # AMATH <op> &* <n> applies a one-argument op to the top n items of the current stack in place
+    def batch(parts):
+        n = get_value(count_operand)
+        if not isinstance(n, int) or n < 0:
+            raise ValueError("Batched AMATH count must be a non-negative integer")
+        if not curstack:
+            raise ValueError("No stack selected for '&*' destination")
+        stack = stacks[curstack]
+        if len(stack) < n:
+            raise IndexError(f"Not enough items on stack '{curstack}' for AMATH {op} &* {n}")
+        try:
+            stack[len(stack) - n:] = list(map(function, stack[len(stack) - n:]))
         except ValueError as e:
             raise ValueError(f"Math error in operation '{op}': {e}")
         except TypeError as e:
             raise TypeError(f"Type error in operation '{op}': {e}")
+    return batch
+
+def amath_compile(parts):
+    op = parts[1].upper()
+    dest = parts[2]
+    operands = parts[3:]
+    if op not in amath_ops:
+        raise ValueError(f"Math error in operation '{op}': Unknown or incorrect arguments for math operation '{op}'")
+    counts, function = amath_ops[op]
 
+    if dest == "&*":
+        if len(operands) != 1 or counts != (1,) or op in amath_multi:
+            raise ValueError(f"Math error in operation '{op}': Batched AMATH needs a one-argument op and a count")
+        return amath_batch_site(op, function, operands[0])
+
+    if counts is not None and len(operands) not in counts:
+        raise ValueError(f"Math error in operation '{op}': Unknown or incorrect arguments for math operation '{op}'")
+    if op in amath_multi and dest != "&":
+        raise ValueError(f"Math error in operation '{op}': {op} requires the '&' destination")
+
+    resolved = [amath_literal(operand) for operand in operands]
+    if all(constant for constant, _ in resolved):
+        constants = [value for _, value in resolved]
+        get_args = lambda: constants
     else:
+        get_args = lambda: [value if constant else get_value(operand)
+                            for operand, (constant, value) in zip(operands, resolved)]
+
+    multi = op in amath_multi
+
+    def site(parts):
+        args = get_args()
+        try:
+            result = function(*args)
+            if multi:
+                for value in result:
+                    amath_store(dest, value)
+            else:
+                amath_store(dest, result)
+        except ValueError as e:
+            raise ValueError(f"Math error in operation '{op}': {e}")
+        except TypeError as e:
+            raise TypeError(f"Type error in operation '{op}': {e}")
+    return site
+
+amath_sites = {}  # Instruction text -> compiled site
+
+def handle_amath(parts):
+    global instruction_pointer, stacks, curstack, registers
+    if len(parts) < 3:
         raise SyntaxError("Invalid advanced MATH syntax")
+    key = tuple(parts)
+    site = amath_sites.get(key)
+    if site is None:
+        try:
+            site = amath_compile(parts)
+        except ValueError:
+            # Operands are evaluated before the op is checked, so their errors come first
+            [get_value(arg) for arg in parts[3:]]
+            raise
+        amath_sites[key] = site
+    site(parts)
 
 instruction_handlers["AMATH"] = handle_amath
@@ -0,0 +1,132 @@
+import math
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def stats_stack(name):
+    if name == "@":
+        name = curstack
+    if name not in stacks:
+        raise LookupError(f"Invalid stack '{name}'")
+    return stacks[name]
+
+def stats_numbers(values):
+    for value in values:
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise TypeError(f"Non-numerical value {value!r} on stack")
+    return values
+
+def stats_nonempty(values):
+    if not values:
+        raise ValueError("Stack is empty")
+    return values
+
+def stats_mean(values):
+    return math.fsum(stats_numbers(stats_nonempty(values))) / len(values)
+
+def stats_var(values):
+    stats_numbers(stats_nonempty(values))
+    if numpy is not None:
+        return float(numpy.var(numpy.asarray(values, dtype=float)))
+    mean = math.fsum(values) / len(values)
+    return math.fsum((value - mean) ** 2 for value in values) / len(values)
+
+def stats_argmax(values):
+    # Returned as a PICK index (0 is the top of the stack)
+    stats_nonempty(values)
+    return max(range(len(values)), key=lambda i: values[-1 - i])
+
+def stats_argmin(values):
+    stats_nonempty(values)
+    return min(range(len(values)), key=lambda i: values[-1 - i])
+
+def stats_dot(left, right):
+    if len(left) != len(right):
+        raise ValueError(f"DOT requires stacks of equal length ({len(left)} != {len(right)})")
+    stats_numbers(left)
+    stats_numbers(right)
+    if numpy is not None and left:
+        return numpy.dot(numpy.asarray(left, dtype=float), numpy.asarray(right, dtype=float)).item()
+    return math.fsum(map(operator.mul, left, right))
+
+def stats_histogram(values, bins, low=None, high=None):
+    stats_numbers(stats_nonempty(values))
+    if not isinstance(bins, int) or bins < 1:
+        raise ValueError("HIST requires a positive integer bin count")
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    if low > high:
+        raise ValueError(f"HIST range is reversed ({low} > {high})")
+    if low == high:
+        # Same as numpy.histogram: an empty range is widened by 0.5 on each side
+        low, high = low - 0.5, high + 0.5
+    if numpy is not None:
+        counts, _ = numpy.histogram(numpy.asarray(values, dtype=float), bins=bins, range=(low, high))
+        return counts.tolist()
+    counts = [0] * bins
+    width = (high - low) / bins
+    for value in values:
+        if low <= value <= high:
+            index = int((value - low) / width)
+            counts[min(index, bins - 1)] += 1
+    return counts
+
+stats_reductions = {
+    "SUM": lambda values: math.fsum(stats_numbers(values)),
+    "MEAN": stats_mean,
+    "VAR": stats_var,
+    "STD": lambda values: math.sqrt(stats_var(values)),
+    "MIN": lambda values: min(stats_numbers(stats_nonempty(values))),
+    "MAX": lambda values: max(stats_numbers(stats_nonempty(values))),
+    "ARGMIN": stats_argmin,
+    "ARGMAX": stats_argmax,
+}
+
+def handle_stats(parts):
+    global instruction_pointer, stacks, curstack, registers
+    if len(parts) < 3:
+        raise SyntaxError("Invalid STATS syntax")
+    op = parts[1].upper()
+
+    try:
+        if op == "SORT":
+            # STATS SORT <stack> [DESC]
+            if len(parts) not in [3, 4]:
+                raise SyntaxError("Invalid STATS SORT syntax. Expected 'STATS SORT <stack> [DESC]'")
+            stats_stack(parts[2]).sort(reverse=len(parts) == 4 and parts[3].upper() == "DESC")
+            return
+        if op == "HIST":
+            # STATS HIST <dest stack> <stack> <bins> [low high]
+            if len(parts) not in [5, 7]:
+                raise SyntaxError("Invalid STATS HIST syntax. Expected 'STATS HIST <dest> <stack> <bins> [low high]'")
+            bounds = [get_value(arg) for arg in parts[5:]]
+            counts = stats_histogram(stats_stack(parts[3]), get_value(parts[4]), *bounds)
+            stats_stack(parts[2]).extend(counts)
+            return
+
+        dest = parts[2]
+        if op == "DOT" and len(parts) == 5:
+            result = stats_dot(stats_stack(parts[3]), stats_stack(parts[4]))
+        elif op in stats_reductions and len(parts) == 4:
+            result = stats_reductions[op](stats_stack(parts[3]))
+        else:
+            raise ValueError(f"Unknown or incorrect arguments for stats operation '{op}'")
+    except ValueError as e:
+        raise ValueError(f"Stats error in operation '{op}': {e}")
+    except TypeError as e:
+        raise TypeError(f"Type error in operation '{op}': {e}")
+
+    if dest == "&":
+        if curstack:
+            stacks[curstack].append(result)
+        else:
+            raise ValueError("No stack selected for '&' destination")
+    elif dest in registers:
+        registers[dest] = result
+    else:
+        raise ValueError(f"Invalid destination '{dest}'")
+
+instruction_handlers["STATS"] = handle_stats
@@ -0,0 +1,49 @@
+# test_dizzypack.py
+# Run with: python -m unittest test_dizzypack
+
+import unittest
+
+import dizzypack
+
+def make_index(packages):
+    """Builds an index from {name: {version: [dependency, ...]}}."""
+    return {"packages": {
+        name: {"versions": {
+            version: {"file": f"{name}/{name}.py", "sha256": "0" * 64, "depends": depends}
+            for version, depends in versions.items()
+        }}
+        for name, versions in packages.items()
+    }}
+
+def versions(resolved):
+    return {name: version for name, (version, entry) in resolved.items()}
+
+class ResolveTest(unittest.TestCase):
+    def test_newest_versions(self):
+        index = make_index({"a": {"1.0": [], "2.0": ["b>=1.0"]}, "b": {"1.0": [], "1.5": []}})
+        self.assertEqual(versions(dizzypack.resolve(["a"], index)), {"a": "2.0", "b": "1.5"})
+
+    def test_dropped_version_constraints_expire(self):
+        # a 2.0 pins b, but x forces a 1.0, so nothing selected asks for b 1.0
+        index = make_index({
+            "a": {"1.0": [], "2.0": ["b==1.0"]},
+            "b": {"1.0": [], "2.0": []},
+            "x": {"1.0": ["a<2"]},
+        })
+        self.assertEqual(versions(dizzypack.resolve(["b", "a", "x"], index)), {"a": "1.0", "b": "2.0", "x": "1.0"})
+
+    def test_backtracks_to_older_version(self):
+        index = make_index({"a": {"1.0": [], "2.0": ["b<2"]}, "b": {"1.0": [], "2.0": []}})
+        self.assertEqual(versions(dizzypack.resolve(["a", "b>=2"], index)), {"a": "1.0", "b": "2.0"})
+
+    def test_unsatisfiable(self):
+        index = make_index({"a": {"2.0": ["b<2"]}, "b": {"1.0": [], "2.0": []}})
+        with self.assertRaises(dizzypack.ResolutionError):
+            dizzypack.resolve(["a", "b>=2"], index)
+
+    def test_missing_package(self):
+        with self.assertRaises(dizzypack.ResolutionError):
+            dizzypack.resolve(["missing"], make_index({}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,17 @@
 import sys
-import re
 import time
-import datetime
 import os # Import the os module for path manipulation
+# re and datetime are imported on first use to keep interpreter startup short
 
 starttime = time.perf_counter()
-dump = ""
+dump = []  # Log entries, joined by DUMP LOGS
 settings = {
-    "intpr": False
+    "intpr": False,
+    "memosize": 256,
+    "intern": False,
+    "tracemem": False
 }
+default_settings = dict(settings)
 
 def printint():
     if settings["intpr"] == True:
@@ -25,10 +28,16 @@ idt = {
     0x1: printint
 }
 
-FIELDS_PATTERN = re.compile(r'\"(.*?)\"|(\S+)')
+FIELDS_PATTERN = None  # Compiled the first time a line contains a quoted string
 
 class shlex:
     def split(data):
+        global FIELDS_PATTERN
+        if '"' not in data:
+            return data.split()
+        if FIELDS_PATTERN is None:
+            import re
+            FIELDS_PATTERN = re.compile(r'\"(.*?)\"|(\S+)')
         parts = []
         for match in FIELDS_PATTERN.finditer(data):
             if match.group(1) is not None:
@@ -38,6 +47,7 @@ class shlex:
         return parts
 
 def dumpfilename():
+    import datetime
     now = datetime.datetime.now()
     timestamp_str = now.strftime("%M%S%Y")
     filename = f"dump-{timestamp_str}.vtd"
@@ -47,10 +57,14 @@ labels = {}
 
 # Get the script's directory for relative imports
 script_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-file = open(sys.argv[1]).read().split("\n")
+program_name = None
+file = []
+file_parts = None  # Pre-split lines of a linked image, parallel to file
+linked_modules = {}  # Compiled IMPORT modules, from a linked image or an earlier IMPORT
 
 immutables = {}
 stacks = {"_loop_stack":[]}
+maps = {}
 curstack = ""
 registers = {
     "ODA": None,
@@ -58,6 +72,7 @@ registers = {
     "CLI": 0,
     "LTM": 0
 }
+default_registers = dict(registers)
 comparison_flags = {"equal": False, "greater": False, "less": False}
 subroutines = {}  # Dictionary to store subroutine definitions
 return_stack = []  # List to store return addresses
@@ -65,6 +80,15 @@ is_in_subroutine = False
 current_subroutine_code = []
 current_subroutine_ip = 0
 subroutine_return_address = None
+memo_cache = {}  # LRU cache of pure subroutine results, oldest first
+memo_stats = {"hits": 0, "misses": 0, "evictions": 0}
+literal_pool = {}  # Quoted operand -> its string, built once and shared by every use
+
+def intern_value(value):
+    # With SET intern True, equal strings made at run time share one object
+    if settings["intern"] and type(value) is str:
+        return sys.intern(value)
+    return value
 
 def handle_new(parts):
     global instruction_pointer
@@ -79,7 +103,7 @@ def handle_push(parts):
         value_to_push = parts[1]
         if not curstack:
             raise LookupError(f"No stack selected for PUSH")
-        stacks[curstack].append(get_value(value_to_push))
+        stacks[curstack].append(intern_value(get_value(value_to_push)))
     else:
         raise SyntaxError(f"Invalid PUSH syntax")
 
@@ -233,13 +257,13 @@ def handle_in(parts):
             try:
                 registers["IDA"] = eval(user_input)
             except (NameError, TypeError, SyntaxError):
-                registers["IDA"] = user_input
+                registers["IDA"] = intern_value(user_input)
         except Exception as e:
             raise ValueError(f"Error processing IN instruction")
     else:
         # No prompt provided, just take raw input
         user_input = input()
-        registers["IDA"] = user_input
+        registers["IDA"] = intern_value(user_input)
 
 
 def handle_concat(parts):
@@ -253,7 +277,7 @@ def handle_concat(parts):
         str2 = str(val2)
 
         if dest_reg in registers:
-            registers[dest_reg] = str1 + str2
+            registers[dest_reg] = intern_value(str1 + str2)
         else:
             raise LookupError(f"Invalid destination register '{dest_reg}' for CONCAT")
     else:
@@ -427,16 +451,167 @@ def handle_rot(parts):
     else:
         raise SyntaxError("Invalid ROT syntax. Expected 'ROT'")
 
+def get_count(operand, instruction):
+    n = get_value(operand)
+    if not isinstance(n, int) or n < 0:
+        raise ValueError(f"{instruction} count must be a non-negative integer")
+    return n
+
+def get_current_stack(instruction):
+    if not curstack:
+        raise LookupError(f"No stack selected for {instruction}")
+    return stacks[curstack]
+
+def get_source_stack(name, instruction):
+    if name not in stacks:
+        raise LookupError(f"Undefined stack '{name}' for {instruction}")
+    return stacks[name]
+
+def handle_pushn(parts):
+    if len(parts) < 2:
+        raise SyntaxError("Invalid PUSHN syntax. Expected 'PUSHN <value> [value...]'")
+    get_current_stack("PUSHN").extend([intern_value(get_value(operand)) for operand in parts[1:]])
+
+def handle_popn(parts):
+    # POPN A B C pops the top into A, the next into B, ...
+    if len(parts) < 2:
+        raise SyntaxError("Invalid POPN syntax. Expected 'POPN <register> [register...]'")
+    stack = get_current_stack("POPN")
+    regs = parts[1:]
+    for reg in regs:
+        if reg not in registers:
+            raise NameError(f"Invalid register '{reg}' for POPN")
+    if len(stack) < len(regs):
+        raise IndexError(f"Not enough items on stack '{curstack}' for POPN {len(regs)}")
+    values = stack[-len(regs):]
+    del stack[-len(regs):]
+    for reg, value in zip(regs, reversed(values)):
+        registers[reg] = value
+
+def handle_dropn(parts):
+    if len(parts) != 2:
+        raise SyntaxError("Invalid DROPN syntax. Expected 'DROPN <n>'")
+    stack = get_current_stack("DROPN")
+    n = get_count(parts[1], "DROPN")
+    if len(stack) < n:
+        raise IndexError(f"Not enough items on stack '{curstack}' for DROPN {n}")
+    del stack[len(stack) - n:]
+
+def handle_slice(parts):
+    # Copies source[start:end] (0 is the bottom) onto the current stack
+    if len(parts) != 4:
+        raise SyntaxError("Invalid SLICE syntax. Expected 'SLICE <source> <start> <end>'")
+    source = get_source_stack(parts[1], "SLICE")
+    start = get_value(parts[2])
+    end = get_value(parts[3])
+    if not isinstance(start, int) or not isinstance(end, int):
+        raise TypeError("SLICE bounds must be integers")
+    get_current_stack("SLICE").extend(source[start:end])
+
+def handle_copyn(parts):
+    if len(parts) != 3:
+        raise SyntaxError("Invalid COPYN syntax. Expected 'COPYN <source> <n>'")
+    source = get_source_stack(parts[1], "COPYN")
+    n = get_count(parts[2], "COPYN")
+    if len(source) < n:
+        raise IndexError(f"Not enough items on stack '{parts[1]}' for COPYN {n}")
+    get_current_stack("COPYN").extend(source[len(source) - n:])
+
+def handle_moven(parts):
+    if len(parts) != 3:
+        raise SyntaxError("Invalid MOVEN syntax. Expected 'MOVEN <source> <n>'")
+    source = get_source_stack(parts[1], "MOVEN")
+    n = get_count(parts[2], "MOVEN")
+    stack = get_current_stack("MOVEN")
+    if len(source) < n:
+        raise IndexError(f"Not enough items on stack '{parts[1]}' for MOVEN {n}")
+    moved = source[len(source) - n:]
+    del source[len(source) - n:]
+    stack.extend(moved)
+
+def handle_rev(parts):
+    # REV reverses the whole stack, REV <n> only the top n items
+    stack = get_current_stack("REV")
+    if len(parts) == 1:
+        stack.reverse()
+    elif len(parts) == 2:
+        n = get_count(parts[1], "REV")
+        if len(stack) < n:
+            raise IndexError(f"Not enough items on stack '{curstack}' for REV {n}")
+        stack[len(stack) - n:] = stack[len(stack) - n:][::-1]
+    else:
+        raise SyntaxError("Invalid REV syntax. Expected 'REV' or 'REV <n>'")
+
+def handle_roll(parts):
+    # ROLL <k> moves the top k items to the bottom; a negative k rolls the other way
+    if len(parts) != 2:
+        raise SyntaxError("Invalid ROLL syntax. Expected 'ROLL <k>'")
+    stack = get_current_stack("ROLL")
+    k = get_value(parts[1])
+    if not isinstance(k, int):
+        raise TypeError("ROLL amount must be an integer")
+    if stack:
+        k %= len(stack)
+        stack[:] = stack[len(stack) - k:] + stack[:len(stack) - k]
+
+def handle_extend(parts):
+    if len(parts) != 2:
+        raise SyntaxError("Invalid EXTEND syntax. Expected 'EXTEND <source>'")
+    source = get_source_stack(parts[1], "EXTEND")
+    get_current_stack("EXTEND").extend(source[:])
+
+def handle_trunc(parts):
+    # TRUNC <n> keeps only the bottom n items
+    if len(parts) != 2:
+        raise SyntaxError("Invalid TRUNC syntax. Expected 'TRUNC <n>'")
+    stack = get_current_stack("TRUNC")
+    del stack[get_count(parts[1], "TRUNC"):]
+
+def deep_size(value, seen):
+    # Bytes held by value and everything it contains; objects already in seen count once
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    return size
+
+def memory_report():
+    # Per-container sizes count shared objects once within that container; the
+    # total counts each object once across the whole VM
+    seen = set()
+    report = {
+        "stacks": {name: {"items": len(stack), "bytes": deep_size(stack, set())} for name, stack in stacks.items()},
+        "maps": {name: {"items": len(entries), "bytes": deep_size(entries, set())} for name, entries in maps.items()},
+        "registers": deep_size(registers, set()),
+        "immutables": deep_size(immutables, set()),
+        "memo": {"items": len(memo_cache), "bytes": deep_size(memo_cache, set())},
+        "literals": {"items": len(literal_pool), "bytes": deep_size(literal_pool, set())},
+        "logs": {"items": len(dump), "bytes": deep_size(dump, set())},
+        "total": sum(deep_size(part, seen) for part in [stacks, maps, registers, immutables, memo_cache, literal_pool, dump]),
+    }
+    if settings["tracemem"]:
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        report["traced"] = {"current": current, "peak": peak}
+    return report
+
 def handle_dump(parts):
-    filename = dumpfilename()
     if len(parts) == 1:
         print(stacks, end='') # Modified: Removed newline
     elif parts[1] == "@":
         print(stacks[curstack], end='') # Modified: Removed newline
         sys.exit(1)
+    elif parts[1] == "MEMO":
+        print({**memo_stats, "size": len(memo_cache), "maxsize": settings["memosize"]}, end='')
     elif parts[1] == "LOGS":
-        with open(filename, 'w') as dumpfile:
-            dumpfile.write(f"==={sys.argv[1]} LOG DUMP===\n"+dump+"\n")
+        with open(dumpfilename(), 'w') as dumpfile:
+            dumpfile.write(f"==={program_name} LOG DUMP===\n"+"".join(dump)+"\n")
+    elif parts[1] == "MEM":
+        print(memory_report(), end='')
     else:
         raise SyntaxError("Invalid DUMP syntax")
 
@@ -517,7 +692,7 @@ def handle_sub(parts):
     subroutine_name = parts[1]
     if subroutine_name in subroutines:
         raise NameError(f"Subroutine '{subroutine_name}' already defined")
-    subroutines[subroutine_name] = {'code': [], 'start': instruction_pointer + 1}
+    subroutines[subroutine_name] = {'code': [], 'start': instruction_pointer + 1, 'pure': parse_pure(parts[2:])}
     instruction_pointer += 1
     while instruction_pointer < len(file):
         line = file[instruction_pointer].strip()
@@ -532,48 +707,93 @@ def handle_sub(parts):
 def handle_endsub(parts):
     pass
 
-def handle_call(parts):
-    global instruction_pointer, subroutines, return_stack
-    if len(parts) != 2:
-        raise SyntaxError("CALL requires a subroutine name")
-    subroutine_name = parts[1]
-    if subroutine_name not in subroutines:
-        raise NameError(f"Undefined subroutine '{subroutine_name}'")
-    return_stack.append(instruction_pointer)
-    subroutine_code = subroutines[subroutine_name]['code']
+def parse_pure(parts):
+    # A subroutine may be declared as 'SUB <name> PURE <arity>'
+    if not parts:
+        return None
+    if len(parts) == 2 and parts[0].upper() == "PURE" and parts[1].isdigit():
+        return int(parts[1])
+    raise SyntaxError("Invalid PURE declaration. Expected 'PURE <arity>'")
+
+def run_subroutine(subroutine_code):
+    global curstack
     subroutine_ip = 0
     while subroutine_ip < len(subroutine_code):
         line = subroutine_code[subroutine_ip]
-        sub_parts = shlex.split(line)
+        # Subroutines from a linked image hold their lines already split
+        sub_parts = line if type(line) is list else shlex.split(line)
         if sub_parts:
             instruction = sub_parts[0].upper()
             if instruction in instruction_handlers:
                 instruction_handlers[instruction](sub_parts)
             elif sub_parts[0] in stacks.keys():
-                global curstack
                 curstack = sub_parts[0]
         subroutine_ip += 1
+
+subroutine_runner = run_subroutine  # Replaced by run_subroutine_hooked while hooks are active
+
+def call_pure(subroutine_name, arity):
+    # Pure subroutines only depend on the top <arity> items of the current stack,
+    # so their result (what is left in place of those items) can be cached.
+    if not curstack:
+        raise LookupError(f"No stack selected for pure CALL '{subroutine_name}'")
+    stack = stacks[curstack]
+    if len(stack) < arity:
+        raise IndexError(f"Not enough items on stack '{curstack}' for pure CALL '{subroutine_name}'")
+    base = len(stack) - arity
+    args = stack[base:]
+    key = (subroutine_name, tuple(args), tuple(map(type, args)))
+    if key in memo_cache:
+        memo_cache[key] = memo_cache.pop(key)
+        memo_stats["hits"] += 1
+        del stack[base:]
+        stack.extend(memo_cache[key])
+        return
+    memo_stats["misses"] += 1
+    entry_stack = curstack
+    subroutine_runner(subroutines[subroutine_name]['code'])
+    # Only cache when the subroutine left the stack below its arguments alone
+    if curstack != entry_stack or stacks.get(entry_stack) is not stack or len(stack) < base:
+        return
+    if settings["memosize"] > 0:
+        memo_cache[key] = tuple(stack[base:])
+        while len(memo_cache) > settings["memosize"]:
+            del memo_cache[next(iter(memo_cache))]
+            memo_stats["evictions"] += 1
+
+def forget_memo(names):
+    # Cached results belong to the definition that computed them; drop them when it is replaced
+    for key in [key for key in memo_cache if key[0] in names]:
+        del memo_cache[key]
+
+def handle_call(parts):
+    global instruction_pointer, subroutines, return_stack
+    if len(parts) != 2:
+        raise SyntaxError("CALL requires a subroutine name")
+    subroutine_name = parts[1]
+    if subroutine_name not in subroutines:
+        raise NameError(f"Undefined subroutine '{subroutine_name}'")
+    return_stack.append(instruction_pointer)
+    arity = subroutines[subroutine_name].get('pure')
+    if arity is not None:
+        call_pure(subroutine_name, arity)
+    else:
+        subroutine_runner(subroutines[subroutine_name]['code'])
     instruction_pointer = return_stack.pop()
 
 def handle_wait(parts):
     sleeptime = (int(parts[1]))/100
     time.sleep(sleeptime)
 
-def handle_bring(parts):
-    global instruction_pointer, subroutines
-    if len(parts) != 2:
-        raise SyntaxError("BRING requires a library filename")
-    library_filename = parts[1]
-    try:
-        with open(library_filename, 'r') as lib_file:
-            library_content = lib_file.read()
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Library file '{library_filename}' not found")
+def parse_library(library_content):
+    library = {}
     blocks = library_content.strip().split(':')
     i = 0
     while i < len(blocks):
         if blocks[i].strip():
-            subroutine_name = blocks[i].strip()
+            header = blocks[i].split()
+            subroutine_name = header[0]
+            pure = parse_pure(header[1:])
             i += 1
             subroutine_code = []
             if i < len(blocks):
@@ -581,29 +801,49 @@ def handle_bring(parts):
                 for line in code_lines:
                     if line.strip():
                         subroutine_code.append(line)
-                subroutines[subroutine_name] = {'code': subroutine_code, 'from_library': True}
+                library[subroutine_name] = {'code': subroutine_code, 'from_library': True, 'pure': pure}
             else:
                 raise SyntaxError(f"Malformed library file: missing code for subroutine '{subroutine_name}'")
         i += 1
+    return library
+
+def read_library(library_filename):
+    try:
+        with open(library_filename, 'r') as lib_file:
+            return lib_file.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Library file '{library_filename}' not found")
+
+def handle_bring(parts):
+    global instruction_pointer, subroutines
+    if len(parts) != 2:
+        raise SyntaxError("BRING requires a library filename")
+    library = parse_library(read_library(parts[1]))
+    forget_memo(library)
+    subroutines.update(library)
 
 def handle_import(parts):
     # Construct the path to the module relative to the script's location
     module_name = parts[1]
+    if module_name in linked_modules:
+        exec(linked_modules[module_name], globals())
+        return
     module_path = os.path.join(script_dir, "libs", f"{module_name}.py")
     try:
         with open(module_path, 'r') as mfile:
-            module_code = mfile.read()
-        exec(module_code)
+            module_code = compile(mfile.read(), module_path, "exec")
+        # Run in the interpreter's namespace so the module's handlers can see its own imports
+        exec(module_code, globals())
+        linked_modules[module_name] = module_code
     except Exception as e:
         raise ImportError(f"Failed to import module '{module_name}' from '{module_path}': {e}")
 
 def handle_im(parts):
-    global dump
     name = f"+{parts[1]}"
     value = get_value(parts[2])
     if name in immutables:
         # Pass or log that it's already defined
-        dump += f"\n Immutable {name} already defined, skipping"
+        dump.append(f"\n Immutable {name} already defined, skipping")
     else:
         immutables[name] = value
 
@@ -612,16 +852,102 @@ def handle_int(parts):
     intpoint()
 
 def handle_set(parts):
-    global dump
     if len(parts) != 3:
         raise SyntaxError("SET requires a setting name and a value")
     setting = parts[1]
     set_value = eval(parts[2])
     if setting in settings:
         settings[setting] = set_value
+        if setting == "tracemem":
+            import tracemalloc
+            if set_value and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            elif not set_value and tracemalloc.is_tracing():
+                tracemalloc.stop()
     else:
         raise NameError(f"Unknown setting '{setting}'")
 
+def get_map(name, instruction):
+    if name not in maps:
+        raise LookupError(f"Undefined map '{name}' for {instruction}")
+    return maps[name]
+
+def handle_map(parts):
+    if len(parts) == 2:
+        maps[parts[1]] = {}
+    else:
+        raise SyntaxError("Invalid MAP syntax. Expected 'MAP <name>'")
+
+def handle_mput(parts):
+    if len(parts) == 4:
+        get_map(parts[1], "MPUT")[get_value(parts[2])] = get_value(parts[3])
+    else:
+        raise SyntaxError("Invalid MPUT syntax. Expected 'MPUT <map> <key> <value>'")
+
+def handle_mget(parts):
+    if len(parts) == 4:
+        dest = parts[1]
+        table = get_map(parts[2], "MGET")
+        key = get_value(parts[3])
+        if key not in table:
+            raise LookupError(f"Key {key!r} not in map '{parts[2]}'")
+        if dest == "&":
+            if curstack:
+                stacks[curstack].append(table[key])
+            else:
+                raise LookupError("No stack selected for '&' destination")
+        elif dest in registers:
+            registers[dest] = table[key]
+        else:
+            raise LookupError(f"Invalid destination '{dest}' for MGET")
+    else:
+        raise SyntaxError("Invalid MGET syntax. Expected 'MGET <dest> <map> <key>'")
+
+def handle_mdel(parts):
+    if len(parts) == 3:
+        table = get_map(parts[1], "MDEL")
+        key = get_value(parts[2])
+        if key not in table:
+            raise LookupError(f"Key {key!r} not in map '{parts[1]}'")
+        del table[key]
+    else:
+        raise SyntaxError("Invalid MDEL syntax. Expected 'MDEL <map> <key>'")
+
+def handle_mhas(parts):
+    global comparison_flags
+    # Sets the equal flag on membership so JUMPEQ / JUMPNEQ can branch on it
+    if len(parts) == 3:
+        comparison_flags["equal"] = get_value(parts[2]) in get_map(parts[1], "MHAS")
+        comparison_flags["greater"] = False
+        comparison_flags["less"] = False
+    else:
+        raise SyntaxError("Invalid MHAS syntax. Expected 'MHAS <map> <key>'")
+
+def handle_msize(parts):
+    if len(parts) == 3:
+        dest = parts[1]
+        size = len(get_map(parts[2], "MSIZE"))
+        if dest == "&":
+            if curstack:
+                stacks[curstack].append(size)
+            else:
+                raise LookupError("No stack selected for '&' destination")
+        elif dest in registers:
+            registers[dest] = size
+        else:
+            raise LookupError(f"Invalid destination '{dest}' for MSIZE")
+    else:
+        raise SyntaxError("Invalid MSIZE syntax. Expected 'MSIZE <dest> <map>'")
+
+def handle_mkeys(parts):
+    if len(parts) == 3:
+        table = get_map(parts[1], "MKEYS")
+        if parts[2] not in stacks:
+            raise LookupError(f"Undefined stack '{parts[2]}' for MKEYS")
+        stacks[parts[2]].extend(table)
+    else:
+        raise SyntaxError("Invalid MKEYS syntax. Expected 'MKEYS <map> <stack>'")
+
 def handle_stack_select(parts):
     global curstack, instruction_pointer
     curstack = parts[0]
@@ -641,7 +967,10 @@ def get_value(operand):
         return immutables[operand]
     elif operand.startswith('"') and operand.endswith('"'):
         # Handle escape sequences for newlines
-        return operand[1:-1].replace('\\n', '\n')
+        literal = literal_pool.get(operand)
+        if literal is None:
+            literal = literal_pool[operand] = sys.intern(operand[1:-1].replace('\\n', '\n'))
+        return literal
     elif operand.upper() == "TRUE":
         return 1
     elif operand.upper() == "FALSE":
@@ -652,6 +981,8 @@ def get_value(operand):
         stack_reg_name = operand[1:]
         if stack_reg_name in stacks:
             return len(stacks[stack_reg_name])
+        elif stack_reg_name in maps:
+            return len(maps[stack_reg_name])
         elif stack_reg_name in registers and isinstance(registers[stack_reg_name], str):
             return len(registers[stack_reg_name])
         elif stack_reg_name in registers and isinstance(registers[stack_reg_name], (int, float)):
@@ -679,18 +1010,161 @@ def get_value(operand):
     else:
         raise TypeError("Invalid data type or undefined variable/literal")
 
-labels_pass = {}
-for line_num, line in enumerate(file):
-    line = line.split(';')[0].strip()
-    parts = shlex.split(line)
-    if parts and parts[0] == "POINT":
-        if len(parts) == 2:
-            label_name = parts[1]
-            if label_name in labels_pass:
-                raise NameError("Label already defined")
-            labels_pass[label_name] = line_num
-
-labels = labels_pass
+def find_labels(lines):
+    labels_pass = {}
+    for line_num, line in enumerate(lines):
+        line = line.split(';')[0].strip()
+        parts = shlex.split(line)
+        if parts and parts[0] == "POINT":
+            if len(parts) == 2:
+                label_name = parts[1]
+                if label_name in labels_pass:
+                    raise NameError("Label already defined")
+                labels_pass[label_name] = line_num
+    return labels_pass
+
+def read_source(path):
+    # Scripts are read as text in the platform's default encoding
+    with open(path) as source:
+        return source.read().split("\n")
+
+def load_program(path):
+    global file, file_parts, labels, program_name
+    program_name = path
+    with open(path, 'rb') as source:
+        if source.read(len(IMAGE_MAGIC)) == IMAGE_MAGIC:
+            source.seek(0)
+            load_image(source.read())
+            return
+    file = read_source(path)
+    file_parts = None
+    labels = find_labels(file)
+
+# Linked images: IMAGE_MAGIC followed by a marshalled dict holding the program
+# lines and their split parts, the resolved labels, the reachable subroutines
+# (their code already split) and the IMPORTed modules as code objects. Removed
+# lines are blanked so line numbers stay the same. CALL and JUMP targets are
+# checked at link time but stay names: each is one dict lookup at run time.
+IMAGE_MAGIC = b"VTI\x01"
+
+def link_program(path):
+    import marshal
+    lines = read_source(path)
+    link_labels = find_labels(lines)
+    program = [line.split(';')[0].strip() for line in lines]
+    available = {}
+    modules = {}
+
+    def define(name, subroutine):
+        if name in available:
+            raise NameError(f"Subroutine '{name}' already defined")
+        available[name] = subroutine
+
+    line_num = 0
+    while line_num < len(program):
+        parts = shlex.split(program[line_num])
+        if parts and parts[0] == "SUB":
+            if len(parts) < 2:
+                raise SyntaxError(f"SUB requires a subroutine name (line {line_num + 1})")
+            code = []
+            end = line_num + 1
+            while end < len(lines) and [part.upper() for part in lines[end].split()[:1]] != ["ENDSUB"]:
+                code.append(lines[end].strip())
+                end += 1
+            if end == len(lines):
+                raise SyntaxError("Missing ENDSUB for subroutine definition")
+            define(parts[1], {'code': code, 'pure': parse_pure(parts[2:])})
+            for blank in range(line_num, end + 1):
+                program[blank] = ""
+            line_num = end
+        elif parts and parts[0] == "BRING":
+            if len(parts) != 2:
+                raise SyntaxError(f"BRING requires a library filename (line {line_num + 1})")
+            available.update(parse_library(read_library(parts[1])))
+            program[line_num] = ""
+        line_num += 1
+
+    # Walk the call graph from the main program and keep only what it reaches
+    def calls(code, main):
+        for line in code:
+            parts = shlex.split(line)
+            if len(parts) == 2 and (parts[0] if main else parts[0].upper()) == "CALL":
+                yield parts[1]
+
+    def jumps(code):
+        for line in code:
+            parts = shlex.split(line.split(';')[0].strip())
+            if len(parts) == 2 and parts[0].upper() in ["JUMP", "JUMPEQ", "JUMPNEQ", "JUMPGT", "JUMPLT"]:
+                yield parts[1]
+
+    reachable = {}
+    pending = list(calls(program, True))
+    while pending:
+        name = pending.pop()
+        if name in reachable:
+            continue
+        if name not in available:
+            raise NameError(f"Undefined subroutine '{name}'")
+        reachable[name] = available[name]
+        pending.extend(calls(reachable[name]['code'], False))
+
+    for code in [program] + [subroutine['code'] for subroutine in reachable.values()]:
+        for label in jumps(code):
+            if label not in link_labels:
+                raise LookupError(f"Undefined label '{label}'")
+
+    # Modules IMPORTed by the program or by any kept subroutine, BRING'd ones included
+    for line in lines + [line for subroutine in reachable.values() for line in subroutine['code']]:
+        parts = shlex.split(line.split(';')[0].strip())
+        if len(parts) == 2 and parts[0].upper() == "IMPORT" and parts[1] not in modules:
+            module_path = os.path.join(script_dir, "libs", f"{parts[1]}.py")
+            with open(module_path) as module_file:
+                modules[parts[1]] = compile(module_file.read(), module_path, "exec")
+
+    image = {
+        "source": path,
+        "python": tuple(sys.version_info[:2]),
+        "program": program,
+        "parts": [shlex.split(line) for line in program],
+        "labels": link_labels,
+        "subroutines": {name: {**subroutine, 'code': [shlex.split(line) for line in subroutine['code']]}
+                        for name, subroutine in reachable.items()},
+        "modules": {name: marshal.dumps(code) for name, code in modules.items()},
+    }
+    return IMAGE_MAGIC + marshal.dumps(image), len(reachable), len(available)
+
+def load_image(content):
+    import marshal
+    global file, file_parts, labels, program_name
+    image = marshal.loads(content[len(IMAGE_MAGIC):])
+    if image["python"] != tuple(sys.version_info[:2]):
+        version = ".".join(map(str, image["python"]))
+        raise ImportError(f"Image '{program_name}' was linked for Python {version}; link it again")
+    file = image["program"]
+    file_parts = image.get("parts")
+    labels = image["labels"]
+    subroutines.update(image["subroutines"])
+    for name, code in image["modules"].items():
+        linked_modules[name] = marshal.loads(code)
+
+def link_command(args):
+    output = None
+    if len(args) == 3 and args[1] == "-o":
+        output = args[2]
+    elif len(args) != 1:
+        print("Usage: vertigo link <script> [-o <image>]")
+        sys.exit(1)
+    source = args[0]
+    if output is None:
+        output = os.path.splitext(source)[0] + ".vti"
+    try:
+        image, kept, defined = link_program(source)
+    except Exception as e:
+        print(f"Link failed for {source}: {type(e).__name__}: {e}")
+        sys.exit(1)
+    with open(output, 'wb') as image_file:
+        image_file.write(image)
+    print(f"Linked {source} -> {output} ({len(image)} bytes, kept {kept} of {defined} subroutines)")
 
 instruction_handlers = {
     "NEW": handle_new,
@@ -729,46 +1203,562 @@ instruction_handlers = {
     "IMPORT": handle_import,
     "IM": handle_im,
     "INT": handle_int,
-    "SET": handle_set
+    "SET": handle_set,
+    "MAP": handle_map,
+    "MPUT": handle_mput,
+    "MGET": handle_mget,
+    "MDEL": handle_mdel,
+    "MHAS": handle_mhas,
+    "MSIZE": handle_msize,
+    "MKEYS": handle_mkeys,
+    "PUSHN": handle_pushn,
+    "POPN": handle_popn,
+    "DROPN": handle_dropn,
+    "SLICE": handle_slice,
+    "COPYN": handle_copyn,
+    "MOVEN": handle_moven,
+    "REV": handle_rev,
+    "ROLL": handle_roll,
+    "EXTEND": handle_extend,
+    "TRUNC": handle_trunc
 }
-dump = ""
 
 instruction_pointer = 0
-
-if len(sys.argv) != 2:
-    for i in range(len(sys.argv[2:])):
-        registers[f"LIN{i}"] = get_value(sys.argv[2:][i])
+instruction = None
 
 def err(type,value,traceback):
-    print(f"File {sys.argv[1]} at line {instruction_pointer + 1}; STOP.\n {type.__name__}: {value}")
+    print(f"File {program_name} at line {instruction_pointer + 1}; STOP.\n {type.__name__}: {value}")
 
-sys.excepthook = err
-instruction = None
-while instruction_pointer < len(file):
-    try:
-        curtime = time.perf_counter() - starttime
-        line = file[instruction_pointer].split(';')[0].strip()
-        parts = shlex.split(line)
-        if parts:
-            instruction = parts[0]
-            if instruction in instruction_handlers:
-                instruction_handlers[instruction](parts)
-                if instruction != "SUB":
+def run():
+    global instruction_pointer, curstack, instruction
+    if any(hooks.values()):
+        return run_hooked()
+    while instruction_pointer < len(file):
+        try:
+            curtime = time.perf_counter() - starttime
+            if file_parts:
+                line = file[instruction_pointer]
+                parts = file_parts[instruction_pointer]
+            else:
+                line = file[instruction_pointer].split(';')[0].strip()
+                parts = shlex.split(line)
+            if parts:
+                instruction = parts[0]
+                if instruction in instruction_handlers:
+                    instruction_handlers[instruction](parts)
+                    if instruction != "SUB":
+                        instruction_pointer += 1
+                elif line in stacks.keys():
+                    curstack = parts[0]
                     instruction_pointer += 1
-            elif line in stacks.keys():
-                curstack = parts[0]
-                instruction_pointer += 1
-            elif not line:
-                instruction_pointer += 1
+                elif not line:
+                    instruction_pointer += 1
+                else:
+                    print(f"Syntax Error: Unknown instruction '{instruction}' on Line {instruction_pointer + 1}", end='') # Modified: Removed newline
+                    sys.exit(1)
             else:
-                print(f"Syntax Error: Unknown instruction '{instruction}' on Line {instruction_pointer + 1}", end='') # Modified: Removed newline
+                instruction_pointer += 1
+            dump.append(f"{instruction} ARGS {parts[1:]}\n{instruction_pointer + 1} [{curtime:.4f}] ")
+            if registers["ODA"] is not None and settings["intpr"] == False:
+                print(registers["ODA"], end='') # Modified: Removed newline
+                registers["ODA"] = None
+        except KeyboardInterrupt:
+            print("KeyboardInterrupt", end='') # Modified: Removed newline
+            sys.exit(1)
+
+# Execution hooks. Callbacks receive:
+#   instruction(parts)  before each instruction, including inside subroutines
+#   call(name) / return(name)  around CALL
+#   interrupt(code)     before INT dispatches through idt
+#   output(value)       when ODA is printed
+#   error(exception)    when an instruction raises
+# run() only switches to the hooked loop when a callback is registered.
+hooks = {"instruction": [], "call": [], "return": [], "interrupt": [], "output": [], "error": []}
+
+def add_hook(event, callback):
+    if event not in hooks:
+        raise NameError(f"Unknown hook event '{event}'")
+    hooks[event].append(callback)
+
+def remove_hook(event, callback):
+    hooks[event].remove(callback)
+
+def fire(event, *args):
+    for callback in hooks[event]:
+        callback(*args)
+
+def run_subroutine_hooked(subroutine_code):
+    global curstack
+    subroutine_ip = 0
+    while subroutine_ip < len(subroutine_code):
+        line = subroutine_code[subroutine_ip]
+        # Subroutines from a linked image hold their lines already split
+        sub_parts = line if type(line) is list else shlex.split(line)
+        if sub_parts:
+            fire("instruction", sub_parts)
+            instruction = sub_parts[0].upper()
+            if instruction in instruction_handlers:
+                instruction_handlers[instruction](sub_parts)
+            elif sub_parts[0] in stacks.keys():
+                curstack = sub_parts[0]
+        subroutine_ip += 1
+
+def handle_call_hooked(parts):
+    name = parts[1] if len(parts) > 1 else None
+    fire("call", name)
+    handle_call(parts)
+    fire("return", name)
+
+def handle_int_hooked(parts):
+    fire("interrupt", eval(parts[1]))
+    output = registers["ODA"] if settings["intpr"] else None
+    handle_int(parts)
+    if output is not None and registers["ODA"] is None:
+        fire("output", output)
+
+def run_hooked():
+    global instruction_pointer, curstack, instruction, subroutine_runner
+    subroutine_runner = run_subroutine_hooked
+    instruction_handlers["CALL"] = handle_call_hooked
+    instruction_handlers["INT"] = handle_int_hooked
+    try:
+        while instruction_pointer < len(file):
+            try:
+                curtime = time.perf_counter() - starttime
+                if file_parts:
+                    line = file[instruction_pointer]
+                    parts = file_parts[instruction_pointer]
+                else:
+                    line = file[instruction_pointer].split(';')[0].strip()
+                    parts = shlex.split(line)
+                if parts:
+                    fire("instruction", parts)
+                    instruction = parts[0]
+                    if instruction in instruction_handlers:
+                        instruction_handlers[instruction](parts)
+                        if instruction != "SUB":
+                            instruction_pointer += 1
+                    elif line in stacks.keys():
+                        curstack = parts[0]
+                        instruction_pointer += 1
+                    elif not line:
+                        instruction_pointer += 1
+                    else:
+                        print(f"Syntax Error: Unknown instruction '{instruction}' on Line {instruction_pointer + 1}", end='')
+                        sys.exit(1)
+                else:
+                    instruction_pointer += 1
+                dump.append(f"{instruction} ARGS {parts[1:]}\n{instruction_pointer + 1} [{curtime:.4f}] ")
+                if registers["ODA"] is not None and settings["intpr"] == False:
+                    fire("output", registers["ODA"])
+                    print(registers["ODA"], end='')
+                    registers["ODA"] = None
+            except KeyboardInterrupt:
+                print("KeyboardInterrupt", end='')
                 sys.exit(1)
+            except Exception as e:
+                fire("error", e)
+                raise
+    finally:
+        subroutine_runner = run_subroutine
+        instruction_handlers["CALL"] = handle_call
+        instruction_handlers["INT"] = handle_int
+
+def start_metrics_exporter(path, interval=5.0):
+    """
+    Counts events through hooks and rewrites path in the Prometheus text format
+    every interval seconds (and once more at exit), for a textfile collector.
+    """
+    import atexit
+    import threading
+    counters = {"instructions": 0, "errors": 0, "outputs": 0, "calls": {}, "interrupts": {}}
+    last = {"time": time.perf_counter(), "instructions": 0}
+
+    def on_instruction(parts):
+        counters["instructions"] += 1
+
+    def on_call(name):
+        counters["calls"][name] = counters["calls"].get(name, 0) + 1
+
+    def on_interrupt(code):
+        counters["interrupts"][code] = counters["interrupts"].get(code, 0) + 1
+
+    def on_output(value):
+        counters["outputs"] += 1
+
+    def on_error(exception):
+        counters["errors"] += 1
+
+    def label(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def write():
+        now = time.perf_counter()
+        executed = counters["instructions"]
+        rate = (executed - last["instructions"]) / (now - last["time"]) if now > last["time"] else 0.0
+        last["time"], last["instructions"] = now, executed
+        lines = [
+            "# HELP vertigo_instructions_total Instructions executed.",
+            "# TYPE vertigo_instructions_total counter",
+            f"vertigo_instructions_total {executed}",
+            "# HELP vertigo_instructions_per_second Instructions per second since the previous export.",
+            "# TYPE vertigo_instructions_per_second gauge",
+            f"vertigo_instructions_per_second {rate:.3f}",
+            "# HELP vertigo_stack_depth Items on each stack.",
+            "# TYPE vertigo_stack_depth gauge",
+        ]
+        lines += [f'vertigo_stack_depth{{stack="{label(name)}"}} {len(stack)}' for name, stack in list(stacks.items())]
+        lines += [
+            "# HELP vertigo_return_stack_depth Nested CALL depth.",
+            "# TYPE vertigo_return_stack_depth gauge",
+            f"vertigo_return_stack_depth {len(return_stack)}",
+            "# HELP vertigo_calls_total CALLs per subroutine.",
+            "# TYPE vertigo_calls_total counter",
+        ]
+        lines += [f'vertigo_calls_total{{subroutine="{label(name)}"}} {count}' for name, count in list(counters["calls"].items())]
+        lines += [
+            "# HELP vertigo_interrupts_total INT instructions per interrupt code.",
+            "# TYPE vertigo_interrupts_total counter",
+        ]
+        lines += [f'vertigo_interrupts_total{{code="{label(code)}"}} {count}' for code, count in list(counters["interrupts"].items())]
+        lines += [
+            "# HELP vertigo_outputs_total Values printed from ODA.",
+            "# TYPE vertigo_outputs_total counter",
+            f"vertigo_outputs_total {counters['outputs']}",
+            "# HELP vertigo_errors_total Instructions that raised an error.",
+            "# TYPE vertigo_errors_total counter",
+            f"vertigo_errors_total {counters['errors']}",
+        ]
+        with open(path + ".tmp", 'w') as metrics_file:
+            metrics_file.write("\n".join(lines) + "\n")
+        os.replace(path + ".tmp", path)
+
+    stopped = threading.Event()
+
+    def export_loop():
+        while not stopped.wait(interval):
+            write()
+
+    def stop():
+        stopped.set()
+        write()
+
+    add_hook("instruction", on_instruction)
+    add_hook("call", on_call)
+    add_hook("interrupt", on_interrupt)
+    add_hook("output", on_output)
+    add_hook("error", on_error)
+    threading.Thread(target=export_loop, daemon=True).start()
+    atexit.register(stop)
+    return stop
+
+def write_state(path):
+    # Final VM state, written at exit for comparing runs (see vertigo_fuzz.py)
+    state = {
+        "stacks": stacks,
+        "maps": maps,
+        "registers": registers,
+        "immutables": immutables,
+        "flags": comparison_flags,
+        "curstack": curstack,
+    }
+    with open(path, 'w') as state_file:
+        state_file.write(repr(state))
+
+def reset_vm():
+    # Back to the state before the first instruction; the loaded program is kept
+    global curstack, instruction_pointer, instruction
+    stacks.clear()
+    stacks["_loop_stack"] = []
+    maps.clear()
+    immutables.clear()
+    subroutines.clear()
+    return_stack.clear()
+    memo_cache.clear()
+    literal_pool.clear()
+    registers.clear()
+    registers.update(default_registers)
+    if settings["tracemem"]:
+        handle_set(["SET", "tracemem", "False"])
+    settings.clear()
+    settings.update(default_settings)
+    comparison_flags.update({"equal": False, "greater": False, "less": False})
+    memo_stats.update({"hits": 0, "misses": 0, "evictions": 0})
+    curstack = ""
+    instruction_pointer = 0
+    instruction = None
+    dump.clear()
+
+sweep_subroutines = {}  # Subroutines present right after loading (a linked image's)
+
+def init_sweep_worker(name, lines, lines_parts, program_labels, loaded_subroutines, modules):
+    import marshal
+    global file, file_parts, labels, program_name
+    program_name = name
+    file = lines
+    file_parts = lines_parts
+    labels = program_labels
+    sweep_subroutines.update(loaded_subroutines)
+    for module_name, code in modules.items():
+        linked_modules[module_name] = marshal.loads(code)
+
+def run_row(index, row):
+    import io
+    reset_vm()
+    subroutines.update(sweep_subroutines)
+    output = io.StringIO()
+    stdout = sys.stdout
+    sys.stdout = output
+    status = "ok"
+    began = time.perf_counter()
+    try:
+        set_arguments(row)
+        run()
+    except SystemExit as e:
+        status = "ok" if e.code in [0, None] else "exit"
+    except Exception as e:
+        status = "error"
+        err(type(e), e, None)
+    finally:
+        sys.stdout = stdout
+    return {"row": index, "args": row, "status": status,
+            "seconds": round(time.perf_counter() - began, 6), "output": output.getvalue()}
+
+def sweep(params_path, workers=None, jsonl=False):
+    # Runs the loaded program once per CSV row (values become LIN0..LINn) on a process pool
+    import csv
+    import json
+    import marshal
+    from concurrent.futures import ProcessPoolExecutor
+    with open(params_path, newline='') as params_file:
+        rows = [row for row in csv.reader(params_file) if row]
+    modules = {name: marshal.dumps(code) for name, code in linked_modules.items()}
+    initargs = (program_name, file, file_parts, labels, dict(subroutines), modules)
+    workers = workers or os.cpu_count() or 1
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_sweep_worker, initargs=initargs) as executor:
+        chunksize = max(1, len(rows) // (workers * 4))
+        for result in executor.map(run_row, range(len(rows)), rows, chunksize=chunksize):
+            if result["status"] != "ok":
+                failed += 1
+            if jsonl:
+                print(json.dumps(result), flush=True)
+            else:
+                print(result["output"], flush=True)
+    return failed
+
+def set_arguments(args):
+    for i in range(len(args)):
+        registers[f"LIN{i}"] = get_value(args[i])
+
+def startup_bench(args, runs=10):
+    # Phases inside this process, then whole cold starts in fresh processes
+    main_time = time.perf_counter()
+    load_program(args[0])
+    set_arguments(args[1:])
+    load_time = time.perf_counter()
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    status = "ok"
+    try:
+        run()
+    except SystemExit:
+        status = "exited"
+    except Exception as e:
+        status = f"stopped with {type(e).__name__}"
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    run_time = time.perf_counter()
+
+    import subprocess
+    if getattr(sys, 'frozen', False):
+        command = [sys.executable] + args
+        baseline = None
+    else:
+        command = [sys.executable, os.path.abspath(sys.argv[0])] + args
+        baseline = [sys.executable, "-c", "pass"]
+
+    def cold_start(command):
+        times = []
+        for _ in range(runs):
+            began = time.perf_counter()
+            subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - began)
+        return sorted(times)[len(times) // 2]
+
+    print(f"Startup breakdown for {args[0]} (in process):")
+    print(f"  module setup   {(main_time - starttime) * 1000:8.2f} ms")
+    print(f"  load + labels  {(load_time - main_time) * 1000:8.2f} ms")
+    print(f"  execution      {(run_time - load_time) * 1000:8.2f} ms ({status})")
+    print(f"  loaded modules {len(sys.modules):5d}")
+    print(f"Cold start, median of {runs} runs:")
+    total = cold_start(command)
+    if baseline:
+        boot = cold_start(baseline)
+        print(f"  python boot    {boot * 1000:8.2f} ms")
+        print(f"  vertigo        {(total - boot) * 1000:8.2f} ms")
+    print(f"  total          {total * 1000:8.2f} ms")
+
+class OutputTracker:
+    # Remembers whether the last thing printed ended a line, so the REPL can
+    # put its prompt on a fresh line after ODA output (printed without newlines)
+    def __init__(self, stream):
+        self.stream = stream
+        self.at_line_start = True
+
+    def write(self, text):
+        if text:
+            self.at_line_start = text.endswith("\n")
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def block_depth(lines):
+    # SUB and LOOP bodies are only compiled once their END is entered
+    depth = 0
+    for line in lines:
+        parts = shlex.split(line.split(';')[0].strip())
+        if parts and parts[0].upper() in ["SUB", "LOOP"]:
+            depth += 1
+        elif parts and parts[0].upper() in ["ENDSUB", "ENDLOOP"]:
+            depth -= 1
+    return depth
+
+def compile_lines(lines):
+    # Appends lines to the program image and registers their POINT labels
+    global instruction_pointer
+    start = len(file)
+    new_labels = {name: line_num + start for name, line_num in find_labels(lines).items()}
+    for name in new_labels:
+        if name in labels:
+            raise NameError(f"Label '{name}' already defined")
+    file.extend(lines)
+    labels.update(new_labels)
+    instruction_pointer = start
+
+def repl():
+    global program_name, instruction_pointer
+    try:
+        import readline # Line editing and history where available
+    except ImportError:
+        pass
+    program_name = "<repl>"
+    timing = False
+    pending = []
+    tracker = OutputTracker(sys.stdout)
+    sys.stdout = tracker
+    print("Vertigo REPL. :time toggles timing, :time <line> times one input, :state shows stacks and registers, :quit exits.")
+    while True:
+        try:
+            line = input("... " if pending else "vtg> ")
+        except EOFError:
+            print()
+            return
+        except KeyboardInterrupt:
+            print()
+            pending = []
+            continue
+        tracker.at_line_start = True
+
+        command = line.strip()
+        time_this = timing
+        if not pending and command.startswith(":"):
+            name, _, rest = command.partition(" ")
+            if name in [":quit", ":q"]:
+                return
+            elif name == ":state":
+                print(f"stacks: {stacks}\nmaps: {maps}\nregisters: {registers}\nsubroutines: {list(subroutines)}")
+                continue
+            elif name == ":time" and not rest:
+                timing = not timing
+                print(f"timing {'on' if timing else 'off'}")
+                continue
+            elif name == ":time":
+                line = rest
+                time_this = True
+            else:
+                print(f"Unknown REPL command '{name}'")
+                continue
+
+        pending.append(line)
+        if block_depth(pending) > 0:
+            continue
+        lines, pending = pending, []
+        try:
+            compile_lines(lines)
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}")
+            continue
+        began = time.perf_counter()
+        try:
+            run()
+        except SystemExit:
+            pass
+        except KeyboardInterrupt:
+            print("KeyboardInterrupt", end='')
+        except Exception as e:
+            print(f"Line {instruction_pointer + 1}; STOP.\n {type(e).__name__}: {e}", end='')
+        instruction_pointer = len(file)
+        elapsed = time.perf_counter() - began
+        if not tracker.at_line_start:
+            print()
+        if time_this:
+            print(f"[{elapsed * 1000:.3f} ms]")
+
+def main(argv):
+    if len(argv) > 2 and argv[1] == "--startup-bench":
+        startup_bench(argv[2:])
+        return
+    if len(argv) > 2 and argv[1] == "link":
+        link_command(argv[2:])
+        return
+    args = argv[1:]
+    metrics_path = None
+    metrics_interval = 5.0
+    state_path = None
+    params_path = None
+    workers = None
+    jsonl = False
+    while args and args[0] in ["--metrics", "--metrics-interval", "--state", "--map", "--workers", "--jsonl"]:
+        if args[0] == "--jsonl":
+            jsonl = True
+            args = args[1:]
+            continue
+        if len(args) < 3:
+            break
+        if args[0] == "--metrics":
+            metrics_path = args[1]
+        elif args[0] == "--state":
+            state_path = args[1]
+        elif args[0] == "--map":
+            params_path = args[1]
+        elif args[0] == "--workers":
+            workers = int(args[1])
         else:
-            instruction_pointer += 1
-        dump += f"{instruction} ARGS {parts[1:]}\n" + f"{instruction_pointer + 1} " + f"[{curtime:.4f}] "
-        if registers["ODA"] is not None and settings["intpr"] == False:
-            print(registers["ODA"], end='') # Modified: Removed newline
-            registers["ODA"] = None
-    except KeyboardInterrupt:
-        print("KeyboardInterrupt", end='') # Modified: Removed newline
-        sys.exit(1)
+            metrics_interval = float(args[1])
+        args = args[2:]
+    if not args or args == ["--repl"]:
+        repl()
+        return
+    load_program(args[0])
+    if params_path:
+        if sweep(params_path, workers, jsonl):
+            sys.exit(1)
+        return
+    set_arguments(args[1:])
+    sys.excepthook = err
+    if metrics_path:
+        start_metrics_exporter(metrics_path, metrics_interval)
+    if state_path:
+        import atexit
+        atexit.register(write_state, state_path)
+    run()
+
+if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        # Frozen builds start --map workers by running this executable again; hand those to multiprocessing
+        import multiprocessing
+        multiprocessing.freeze_support()
+    main(sys.argv)
@@ -0,0 +1,269 @@
+# vertigo_fuzz.py
+# Differential fuzzer: runs random Vertigo programs on the reference
+# interpreter loop and on a candidate execution path, and reports (and
+# minimizes) any program where output, exit status, final state or error
+# message differ.
+
+import sys
+import os
+import random
+import subprocess
+import tempfile
+
+# --- Configuration ---
+VERTIGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vertigo.py")
+RUN_TIMEOUT = 10 # Seconds before a run counts as hung
+REGISTERS = ["A", "B", "C"] # Only ever written with numbers
+STRING_REGISTERS = ["S"] # Only ever written with strings
+STACKS = ["s", "t"]
+STRINGS = ['"a"', '"bc"', '"x y"', '"n\\n"']
+MAP_KEYS = ["1", "2", "3"] # Set in the prelude, so MGET finds them
+ERROR_RATE = 0.01 # Share of statements that are deliberately ill-typed
+
+# --- Program Generator ---
+# Programs only jump forward and every LOOP sets LTM right before it, so they
+# always terminate. Subroutine bodies are straight-line: a JUMP inside a SUB
+# moves the main instruction pointer. Operands are typed (numbers for MATH,
+# strings for the string ops) so most programs run to the end; ERROR_RATE
+# keeps a small share of statements that stop the program with an error.
+
+def random_number(rng):
+    choice = rng.random()
+    if choice < 0.6:
+        return str(rng.randint(-5, 20))
+    elif choice < 0.9:
+        return f"{rng.uniform(-10, 10):.2f}"
+    return rng.choice(["0", "1", "0x1f", "TRUE", "FALSE"])
+
+def random_operand(rng):
+    """Returns a numeric operand."""
+    choice = rng.random()
+    if choice < 0.55:
+        return random_number(rng)
+    elif choice < 0.72:
+        return rng.choice(REGISTERS)
+    elif choice < 0.9:
+        return rng.choice(["@", "@1", "@2"])
+    return "$" + rng.choice(STACKS + ["m"] + STRING_REGISTERS)
+
+def random_string(rng):
+    # '#' joins the current stack into one string
+    if rng.random() < 0.25:
+        return "#"
+    return rng.choice(STRINGS + STRING_REGISTERS)
+
+def random_value(rng):
+    """Returns an operand of either type, mostly numeric so stacks stay numeric."""
+    return random_string(rng) if rng.random() < 0.05 else random_operand(rng)
+
+def error_statement(rng):
+    """Returns an instruction that always fails."""
+    return rng.choice([
+        f"STRLEN {rng.choice(REGISTERS)} {random_number(rng)}",
+        f"STRCMP {random_number(rng)} {random_string(rng)}",
+        f"MATH ADD {rng.choice(REGISTERS)} {random_string(rng)} 1",
+        f"MGET {rng.choice(REGISTERS)} m 99",
+    ])
+
+def random_statement(rng, subroutines):
+    """Returns one straight-line instruction (no jumps, labels or blocks)."""
+    if rng.random() < ERROR_RATE:
+        return error_statement(rng)
+    kind = rng.randrange(26)
+    if kind < 5 or kind > 22:
+        return f"PUSH {random_value(rng)}"
+    elif kind == 5:
+        return f"POP {rng.choice(REGISTERS + ['ODA'])}"
+    elif kind == 6:
+        return rng.choice(["DUP", "DUP", "SWAP", "SWAP", "DROP", "ROT", "RROT", "CLEAR"])
+    elif kind == 7:
+        return f"{rng.choice(['PICK', 'PPICK'])} {rng.randint(0, 3)}"
+    elif kind in [8, 9]:
+        op = rng.choice(["ADD", "MINUS", "MUL", "DIV", "MOD", "POW"])
+        return f"MATH {op} {rng.choice(REGISTERS + ['&'])} {random_operand(rng)} {random_operand(rng)}"
+    elif kind == 10:
+        return rng.choice([f"CMP {random_operand(rng)} {random_operand(rng)}",
+                           f"STRCMP {random_string(rng)} {random_string(rng)}"])
+    elif kind == 11:
+        return f"CONCAT {rng.choice(STRING_REGISTERS + ['ODA'])} {random_value(rng)} {random_value(rng)}"
+    elif kind == 12:
+        return f"STRLEN {rng.choice(REGISTERS)} {random_string(rng)}"
+    elif kind == 13:
+        op = rng.choice(["AND", "OR", "NOT", "EQUAL", "NEQUAL"])
+        count = 1 if op == "NOT" else 2
+        return f"OPS {op} {rng.choice(REGISTERS + ['&'])} " + " ".join(random_value(rng) for _ in range(count))
+    elif kind == 14:
+        return rng.choice(STACKS)
+    elif kind == 15 and subroutines:
+        return f"CALL {rng.choice(subroutines)}"
+    elif kind == 16:
+        return f"MPUT m {rng.choice(MAP_KEYS + [random_number(rng)])} {random_operand(rng)}"
+    elif kind == 17:
+        return rng.choice([f"MGET {rng.choice(REGISTERS + ['&'])} m {rng.choice(MAP_KEYS)}", f"MHAS m {random_value(rng)}"])
+    elif kind == 18:
+        return rng.choice([
+            "PUSHN " + " ".join(random_number(rng) for _ in range(rng.randint(1, 4))),
+            f"DROPN {rng.randint(0, 3)}",
+            f"REV {rng.randint(0, 4)}",
+            f"ROLL {rng.randint(-3, 3)}",
+            f"TRUNC {rng.randint(0, 5)}",
+        ])
+    elif kind == 19:
+        other = rng.choice(STACKS)
+        return rng.choice([f"COPYN {other} {rng.randint(0, 2)}", f"MOVEN {other} {rng.randint(0, 2)}",
+                           f"SLICE {other} {rng.randint(0, 2)} {rng.randint(0, 4)}", f"EXTEND {other}"])
+    elif kind == 20:
+        return f"AMATH {rng.choice(['SIN', 'COS', 'SQRT', 'ABS', 'FLOOR', 'EXP'])} {rng.choice(REGISTERS + ['&'])} {random_operand(rng)}"
+    elif kind == 21:
+        return f"POPN {' '.join(rng.sample(REGISTERS, rng.randint(1, 3)))}"
+    return rng.choice(["DUMP", "DUMP MEMO"])
+
+def generate_program(rng, length=40):
+    """Returns the lines of a random, terminating Vertigo program."""
+    lines = ["IMPORT amath", "MAP m"] + [f"REG {reg}" for reg in REGISTERS + STRING_REGISTERS]
+    lines += [f"MPUT m {key} {random_number(rng)}" for key in MAP_KEYS]
+    lines += [f"CONCAT {reg} {rng.choice(STRINGS)} {rng.choice(STRINGS)}" for reg in STRING_REGISTERS]
+    for stack in STACKS:
+        lines += [f"NEW {stack}", stack, "PUSHN " + " ".join(random_number(rng) for _ in range(6))]
+    lines += [f"MATH ADD {reg} 0 {random_number(rng)}" for reg in REGISTERS]
+    subroutines = []
+    for index in range(rng.randint(0, 3)):
+        name = f"sub{index}"
+        header = f"SUB {name}" + (f" PURE {rng.randint(0, 2)}" if rng.random() < 0.3 else "")
+        lines.append(header)
+        lines.extend(random_statement(rng, subroutines) for _ in range(rng.randint(1, 5)))
+        lines.append("ENDSUB")
+        subroutines.append(name)
+
+    pending_labels = []
+    label_count = 0
+    body = []
+    while len(body) < length:
+        choice = rng.random()
+        if choice < 0.08:
+            label = f"L{label_count}"
+            label_count += 1
+            pending_labels.append(label)
+            body.append(f"{rng.choice(['JUMP', 'JUMPEQ', 'JUMPNEQ', 'JUMPGT', 'JUMPLT'])} {label}")
+        elif choice < 0.13 and pending_labels:
+            body.append(f"POINT {pending_labels.pop(rng.randrange(len(pending_labels)))}")
+        elif choice < 0.16:
+            body.append(f"MATH ADD LTM 0 {rng.randint(1, 3)}")
+            body.append("LOOP")
+            body.extend(random_statement(rng, subroutines) for _ in range(rng.randint(1, 4)))
+            body.append("ENDLOOP")
+        else:
+            body.append(random_statement(rng, subroutines))
+    body.extend(f"POINT {label}" for label in pending_labels)
+    return lines + body
+
+# --- Execution Paths ---
+# A path runs a program file and returns (exit status, stdout, stderr, final
+# state). A path that refuses the program returns the status "rejected"; that
+# only counts as agreeing when the reference run fails too.
+
+def run_vertigo(args, state_path):
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    try:
+        result = subprocess.run([sys.executable, VERTIGO_PATH, "--state", state_path] + args,
+                                capture_output=True, text=True, timeout=RUN_TIMEOUT, stdin=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        return ("timeout", "", "", "")
+    try:
+        with open(state_path) as state_file:
+            state = state_file.read()
+    except FileNotFoundError:
+        state = ""
+    return (result.returncode, result.stdout, result.stderr, state)
+
+def reference_path(program_path, workdir):
+    return run_vertigo([program_path], os.path.join(workdir, "reference.state"))
+
+def hooked_path(program_path, workdir):
+    # Registering any hook (here the metrics exporter) selects run_hooked()
+    return run_vertigo(["--metrics", os.path.join(workdir, "metrics.prom"), program_path],
+                       os.path.join(workdir, "hooked.state"))
+
+def linked_path(program_path, workdir):
+    image_path = os.path.splitext(program_path)[0] + ".vti"
+    link = subprocess.run([sys.executable, VERTIGO_PATH, "link", program_path, "-o", image_path],
+                          capture_output=True, text=True, timeout=RUN_TIMEOUT)
+    if link.returncode != 0:
+        return ("rejected", link.stdout, link.stderr, "")
+    status, stdout, stderr, state = run_vertigo([image_path], os.path.join(workdir, "linked.state"))
+    # Error messages name the file that was run
+    return (status, stdout.replace(image_path, program_path), stderr.replace(image_path, program_path), state)
+
+CANDIDATES = {
+    "hooked": hooked_path,
+    "linked": linked_path,
+}
+
+# --- Comparison and Minimization ---
+
+def differences(program_lines, candidate, workdir):
+    """Runs both paths and returns the list of differing fields (empty if they agree)."""
+    program_path = os.path.join(workdir, "program.vtg")
+    with open(program_path, 'w') as program_file:
+        program_file.write("\n".join(program_lines))
+    expected = reference_path(program_path, workdir)
+    actual = CANDIDATES[candidate](program_path, workdir)
+    if actual[0] == "rejected":
+        return [] if expected[0] != 0 else ["rejected a program the reference runs"]
+    fields = ["exit status", "output", "stderr", "final state"]
+    return [field for field, left, right in zip(fields, expected, actual) if left != right]
+
+def minimize(program_lines, candidate, workdir):
+    """Removes lines (in shrinking chunks) for as long as the paths still disagree."""
+    lines = list(program_lines)
+    chunk = max(1, len(lines) // 2)
+    while chunk >= 1:
+        start = 0
+        while start < len(lines):
+            attempt = lines[:start] + lines[start + chunk:]
+            if attempt and differences(attempt, candidate, workdir):
+                lines = attempt
+            else:
+                start += chunk
+        chunk //= 2
+    return lines
+
+def fuzz(runs, seed, candidates, length):
+    """Returns the number of failing programs found."""
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for run in range(runs):
+            program_seed = seed + run
+            program = generate_program(random.Random(program_seed), length)
+            for candidate in candidates:
+                diff = differences(program, candidate, workdir)
+                if not diff:
+                    continue
+                failures += 1
+                minimized = minimize(program, candidate, workdir)
+                failure_path = f"fuzz-failure-{candidate}-{program_seed}.vtg"
+                with open(failure_path, 'w') as failure_file:
+                    failure_file.write("\n".join(minimized) + "\n")
+                print(f"Seed {program_seed}: '{candidate}' differs in {', '.join(diff)}; "
+                      f"minimized to {len(minimized)} line(s) in {failure_path}")
+        print(f"{runs} program(s), {len(candidates)} candidate(s): {failures} failure(s).")
+    return failures
+
+# --- Main Execution ---
+
+def main():
+    args = sys.argv[1:]
+    options = {"--runs": "100", "--seed": "0", "--length": "40", "--candidate": ",".join(CANDIDATES)}
+    while len(args) >= 2 and args[0] in options:
+        options[args[0]] = args[1]
+        args = args[2:]
+    candidates = options["--candidate"].split(",")
+    if args or any(candidate not in CANDIDATES for candidate in candidates):
+        print(f"Usage: vertigo_fuzz [--runs N] [--seed S] [--length L] [--candidate {','.join(CANDIDATES)}]")
+        sys.exit(1)
+    if fuzz(int(options["--runs"]), int(options["--seed"]), candidates, int(options["--length"])):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
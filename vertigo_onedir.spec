@@ -0,0 +1,46 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Startup-optimized build: onedir (no unpacking to a temp dir on every launch)
+# with bytecode precompiled at optimize level 2.
+
+a = Analysis(
+    ['vertigo.py'],
+    pathex=[],
+    binaries=[],
+    datas=[("libs", "libs")],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='vertigo',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='vertigo-onedir',
+)